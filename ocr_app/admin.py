@@ -5,6 +5,8 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, TextField, Value, When
 from .models import (
     AccountRequest, UserProfile, Project, ProjectPermission, Document, 
     Image, Annotation, Transcription, ExportJob
@@ -17,6 +19,7 @@ class AccountRequestAdmin(admin.ModelAdmin):
         'username', 'email', 'get_full_name', 'status', 'requested_at', 
         'reviewed_by', 'reviewed_at'
     ]
+    list_select_related = ['reviewed_by']
     list_filter = ['status', 'requested_at', 'reviewed_at']
     search_fields = ['username', 'email', 'first_name', 'last_name']
     readonly_fields = ['requested_at', 'password_hash']
@@ -36,68 +39,61 @@ class AccountRequestAdmin(admin.ModelAdmin):
     
     actions = ['approve_requests', 'deny_requests']
     
+    # Requests handled per bulk insert/update round in approve_requests
+    APPROVAL_BATCH_SIZE = 500
+    
     def get_full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}".strip() or '-'
     get_full_name.short_description = 'Full Name'
     
+    @transaction.atomic
     def approve_requests(self, request, queryset):
         approved_count = 0
         error_count = 0
+        now = timezone.now()
+        skipped_usernames = []
+        skipped_emails = []
+        errors = []
+        
+        # Lock the selected requests so concurrent reviews can't double-approve.
+        # Only the ids are read up front, and the cursor is closed before any
+        # writes; the rows themselves are loaded one batch at a time.
+        pending_ids = list(
+            queryset.select_for_update().filter(status='pending').values_list('pk', flat=True)
+        )
+        for start in range(0, len(pending_ids), self.APPROVAL_BATCH_SIZE):
+            batch = list(AccountRequest.objects.filter(
+                pk__in=pending_ids[start:start + self.APPROVAL_BATCH_SIZE]
+            ))
+            approved, failed = self._approve_batch(
+                request, batch, now, skipped_usernames, skipped_emails, errors
+            )
+            approved_count += approved
+            error_count += failed
         
-        for account_request in queryset.filter(status='pending'):
-            try:
-                # Check if username or email already exists
-                if User.objects.filter(username=account_request.username).exists():
-                    self.message_user(
-                        request, 
-                        f"Username '{account_request.username}' already exists. Skipped.",
-                        level=messages.WARNING
-                    )
-                    continue
-                
-                if User.objects.filter(email=account_request.email).exists():
-                    self.message_user(
-                        request, 
-                        f"Email '{account_request.email}' already exists. Skipped.",
-                        level=messages.WARNING
-                    )
-                    continue
-                
-                # Create the user account
-                user = User.objects.create_user(
-                    username=account_request.username,
-                    email=account_request.email,
-                    first_name=account_request.first_name,
-                    last_name=account_request.last_name,
-                    password=None  # We'll set the password from the hash
-                )
-                
-                # Set the pre-hashed password
-                user.password = account_request.password_hash
-                user.save()
-                
-                # Approve the user profile (created by signal)
-                profile = user.profile
-                profile.is_approved = True
-                profile.approved_by = request.user
-                profile.approved_at = timezone.now()
-                profile.save()
-                
-                # Update the request
-                account_request.status = 'approved'
-                account_request.reviewed_by = request.user
-                account_request.reviewed_at = timezone.now()
-                account_request.save()
-                
-                approved_count += 1
-                
-            except Exception as e:
-                error_count += 1
-                self.message_user(
-                    request, 
-                    f"Error approving {account_request.username}: {str(e)}",
-                    level=messages.ERROR
-                )
+        # One message per category rather than one per skipped request
+        if skipped_usernames:
+            self.message_user(
+                request, 
+                f"Skipped {len(skipped_usernames)} existing username(s): "
+                f"{self._summarize(skipped_usernames)}",
+                level=messages.WARNING
+            )
+        
+        if skipped_emails:
+            self.message_user(
+                request, 
+                f"Skipped {len(skipped_emails)} existing email(s): "
+                f"{self._summarize(skipped_emails)}",
+                level=messages.WARNING
+            )
+        
+        if errors:
+            self.message_user(
+                request, 
+                f"Error approving account requests: {self._summarize(errors)}",
+                level=messages.ERROR
+            )
         
         if approved_count > 0:
             self.message_user(
@@ -115,16 +111,119 @@ class AccountRequestAdmin(admin.ModelAdmin):
     
     approve_requests.short_description = "Approve selected account requests"
     
-    def deny_requests(self, request, queryset):
-        updated = 0
-        for account_request in queryset.filter(status='pending'):
-            account_request.status = 'denied'
+    def _approve_batch(self, request, batch, now, skipped_usernames, skipped_emails, errors):
+        """Create approved users for one batch of requests; returns (approved, failed)"""
+        # Compare the values as they will be stored, so requests that only
+        # differ from an existing account after normalization are skipped
+        usernames = {r.pk: User.normalize_username(r.username) for r in batch}
+        emails = {r.pk: User.objects.normalize_email(r.email) for r in batch}
+        
+        # Look up existing usernames/emails for the whole batch up front
+        taken_usernames = set(User.objects.filter(
+            username__in=usernames.values()
+        ).values_list('username', flat=True))
+        taken_emails = set(User.objects.filter(
+            email__in=emails.values()
+        ).values_list('email', flat=True))
+        
+        valid = []
+        for account_request in batch:
+            username = usernames[account_request.pk]
+            email = emails[account_request.pk]
+            
+            # Check if username or email already exists
+            if username in taken_usernames:
+                skipped_usernames.append(account_request.username)
+                continue
+            
+            if email in taken_emails:
+                skipped_emails.append(account_request.email)
+                continue
+            
+            # Guard against duplicates later in the same batch
+            taken_usernames.add(username)
+            taken_emails.add(email)
+            valid.append(account_request)
+        
+        if not valid:
+            return 0, 0
+        
+        try:
+            with transaction.atomic():
+                self._create_approved_users(request, valid, now)
+        except IntegrityError:
+            # One bad row fails the whole insert, so retry the batch row by
+            # row in savepoints; the other requests are still approved
+            approved = 0
+            for account_request in valid:
+                try:
+                    with transaction.atomic():
+                        self._create_approved_users(request, [account_request], now)
+                except Exception as e:
+                    errors.append(f"{account_request.username}: {e}")
+                else:
+                    approved += 1
+            return approved, len(valid) - approved
+        except Exception as e:
+            errors.append(str(e))
+            return 0, len(valid)
+        
+        return len(valid), 0
+    
+    def _create_approved_users(self, request, account_requests, now):
+        """Bulk create approved users and profiles and mark the requests approved"""
+        # Create the user accounts with the pre-hashed passwords
+        users = [
+            User(
+                username=User.normalize_username(r.username),
+                email=User.objects.normalize_email(r.email),
+                first_name=r.first_name,
+                last_name=r.last_name,
+                password=r.password_hash
+            )
+            for r in account_requests
+        ]
+        User.objects.bulk_create(users)
+        
+        # bulk_create doesn't send post_save, so create the
+        # approved profiles here instead of via the signal
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                is_approved=True,
+                approved_by=request.user,
+                approved_at=now
+            )
+            for user in users
+        ])
+        
+        # Update the requests
+        for account_request in account_requests:
+            account_request.status = 'approved'
             account_request.reviewed_by = request.user
-            account_request.reviewed_at = timezone.now()
-            if not account_request.admin_notes:
-                account_request.admin_notes = f"Denied by {request.user.username} via admin action"
-            account_request.save()
-            updated += 1
+            account_request.reviewed_at = now
+        AccountRequest.objects.bulk_update(
+            account_requests, ['status', 'reviewed_by', 'reviewed_at']
+        )
+    
+    def _summarize(self, values, limit=20):
+        summary = ', '.join(values[:limit])
+        if len(values) > limit:
+            summary += f", ... ({len(values) - limit} more)"
+        return summary
+    
+    def deny_requests(self, request, queryset):
+        # A single UPDATE; the default note only fills in empty admin_notes
+        updated = queryset.filter(status='pending').update(
+            status='denied',
+            reviewed_by=request.user,
+            reviewed_at=timezone.now(),
+            admin_notes=Case(
+                When(admin_notes='', then=Value(f"Denied by {request.user.username} via admin action")),
+                default=F('admin_notes'),
+                output_field=TextField()
+            )
+        )
         
         if updated > 0:
             self.message_user(
@@ -149,17 +248,36 @@ class UserProfileInline(admin.StackedInline):
     readonly_fields = ['approval_requested_at']
 
 
+class ApprovalStatusFilter(admin.SimpleListFilter):
+    title = 'approval status'
+    parameter_name = 'approved'
+    
+    def lookups(self, request, model_admin):
+        return [('yes', 'Approved'), ('no', 'Pending')]
+    
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(profile__is_approved=True)
+        if self.value() == 'no':
+            return queryset.filter(profile__is_approved=False)
+        return queryset
+
+
 class UserAdmin(BaseUserAdmin):
     inlines = (UserProfileInline,)
     list_display = [
         'username', 'email', 'first_name', 'last_name', 'is_staff', 
         'get_approval_status', 'get_approval_date'
     ]
-    list_filter = BaseUserAdmin.list_filter + ('profile__is_approved',)
+    list_filter = BaseUserAdmin.list_filter + (ApprovalStatusFilter,)
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('profile')
     
     def get_approval_status(self, obj):
-        if hasattr(obj, 'profile'):
-            if obj.profile.is_approved:
+        profile = getattr(obj, 'profile', None)
+        if profile is not None:
+            if profile.is_approved:
                 return format_html('<span style="color: green;">✓ Approved</span>')
             else:
                 return format_html('<span style="color: red;">✗ Pending</span>')
@@ -167,8 +285,9 @@ class UserAdmin(BaseUserAdmin):
     get_approval_status.short_description = 'Approval Status'
     
     def get_approval_date(self, obj):
-        if hasattr(obj, 'profile') and obj.profile.approved_at:
-            return obj.profile.approved_at.strftime('%Y-%m-%d %H:%M')
+        profile = getattr(obj, 'profile', None)
+        if profile is not None and profile.approved_at:
+            return profile.approved_at.strftime('%Y-%m-%d %H:%M')
         return '-'
     get_approval_date.short_description = 'Approved Date'
 
@@ -186,14 +305,11 @@ class UserProfileAdmin(admin.ModelAdmin):
     actions = ['approve_users', 'revoke_approval']
     
     def approve_users(self, request, queryset):
-        updated = 0
-        for profile in queryset.filter(is_approved=False):
-            profile.is_approved = True
-            profile.approved_by = request.user
-            profile.approved_at = timezone.now()
-            profile.save()
-            updated += 1
-        
+        updated = queryset.filter(is_approved=False).update(
+            is_approved=True,
+            approved_by=request.user,
+            approved_at=timezone.now()
+        )
         self.message_user(request, f'{updated} users approved successfully.')
     approve_users.short_description = "Approve selected users"
     
@@ -211,37 +327,59 @@ class ProjectPermissionInline(admin.TabularInline):
     model = ProjectPermission
     extra = 0
     fk_name = 'project'
+    autocomplete_fields = ['user', 'granted_by']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'granted_by', 'project')
 
 
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
     list_display = ['name', 'owner', 'document_count', 'is_public', 'created_at', 'updated_at']
+    list_select_related = ['owner']
     list_filter = ['is_public', 'created_at', 'owner']
     search_fields = ['name', 'description', 'owner__username']
     readonly_fields = ['id', 'created_at', 'updated_at']
     inlines = [ProjectPermissionInline]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _document_count=Count('documents')
+        )
+    
     def document_count(self, obj):
-        return obj.documents.count()
+        return obj._document_count
     document_count.short_description = 'Documents'
+    document_count.admin_order_field = '_document_count'
 
 
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
     list_display = ['name', 'project', 'image_count', 'reading_order', 'created_at', 'updated_at']
+    list_select_related = ['project', 'project__owner']
     list_filter = ['reading_order', 'default_transcription_type', 'created_at', 'project__owner']
     search_fields = ['name', 'description', 'project__name']
     readonly_fields = ['id', 'created_at', 'updated_at']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _image_count=Count('images')
+        )
+    
     def image_count(self, obj):
-        return obj.images.count()
+        return obj._image_count
     image_count.short_description = 'Images'
+    image_count.admin_order_field = '_image_count'
 
 
 class AnnotationInline(admin.TabularInline):
     model = Annotation
     extra = 0
     readonly_fields = ['id', 'created_at']
+    raw_id_fields = ['created_by']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('image', 'created_by')
 
 
 class TranscriptionInline(admin.TabularInline):
@@ -249,6 +387,12 @@ class TranscriptionInline(admin.TabularInline):
     extra = 0
     readonly_fields = ['id', 'version', 'created_at']
     fields = ['transcription_type', 'api_endpoint', 'status', 'is_current', 'version']
+    
+    def get_queryset(self, request):
+        # Row labels use __str__, which walks annotation -> image
+        return super().get_queryset(request).select_related(
+            'image', 'annotation__image'
+        ).defer('text_content', 'api_response_raw')
 
 
 @admin.register(Image)
@@ -258,11 +402,20 @@ class ImageAdmin(admin.ModelAdmin):
         'dimensions', 'annotation_count', 'transcription_count', 
         'is_processed', 'created_at'
     ]
+    list_select_related = ['document', 'document__project']
+    show_full_result_count = False
     list_filter = ['is_processed', 'created_at', 'document__project__owner']
     search_fields = ['name', 'original_filename', 'document__name', 'document__project__name']
     readonly_fields = ['id', 'file_size', 'width', 'height', 'created_at', 'updated_at']
+    autocomplete_fields = ['document']
     inlines = [AnnotationInline, TranscriptionInline]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _annotation_count=Count('annotations', distinct=True),
+            _transcription_count=Count('transcriptions', distinct=True)
+        )
+    
     def file_size_kb(self, obj):
         if obj.file_size:
             return f"{obj.file_size / 1024:.1f} KB"
@@ -276,12 +429,14 @@ class ImageAdmin(admin.ModelAdmin):
     dimensions.short_description = 'Dimensions'
     
     def annotation_count(self, obj):
-        return obj.annotations.count()
+        return obj._annotation_count
     annotation_count.short_description = 'Annotations'
+    annotation_count.admin_order_field = '_annotation_count'
     
     def transcription_count(self, obj):
-        return obj.transcriptions.count()
+        return obj._transcription_count
     transcription_count.short_description = 'Transcriptions'
+    transcription_count.admin_order_field = '_transcription_count'
 
 
 @admin.register(Annotation)
@@ -290,9 +445,12 @@ class AnnotationAdmin(admin.ModelAdmin):
         'id', 'image', 'annotation_type', 'label', 'reading_order', 
         'created_by', 'created_at'
     ]
+    list_select_related = ['image', 'image__document', 'created_by']
+    show_full_result_count = False
     list_filter = ['annotation_type', 'created_at', 'created_by']
     search_fields = ['label', 'image__name', 'image__document__name']
     readonly_fields = ['id', 'created_at', 'updated_at']
+    autocomplete_fields = ['image', 'created_by']
 
 
 @admin.register(Transcription)
@@ -305,6 +463,7 @@ class TranscriptionAdmin(admin.ModelAdmin):
         'transcription_type', 'status', 'api_endpoint', 'is_current', 
         'created_at', 'created_by'
     ]
+    show_full_result_count = False
     search_fields = [
         'text_content', 'image__name', 'image__document__name',
         'api_endpoint', 'api_model'
@@ -313,11 +472,13 @@ class TranscriptionAdmin(admin.ModelAdmin):
         'id', 'version', 'api_response_raw', 'processing_time', 
         'created_at', 'updated_at'
     ]
+    autocomplete_fields = ['image', 'annotation', 'created_by']
     
     def get_queryset(self, request):
+        # The large text/JSON columns aren't listed; the change form loads them on access
         return super().get_queryset(request).select_related(
             'image', 'image__document', 'created_by'
-        )
+        ).defer('text_content', 'api_response_raw')
 
 
 @admin.register(ExportJob)
@@ -326,6 +487,8 @@ class ExportJobAdmin(admin.ModelAdmin):
         'id', 'export_type', 'export_format', 'status', 'file_size_mb',
         'requested_by', 'created_at', 'completed_at'
     ]
+    list_select_related = ['requested_by']
+    show_full_result_count = False
     list_filter = ['export_type', 'export_format', 'status', 'created_at']
     search_fields = ['id', 'requested_by__username', 'file_path']
     readonly_fields = [
@@ -340,10 +503,7 @@ class ExportJobAdmin(admin.ModelAdmin):
 
 
 # Re-register User admin with the profile inline
-admin.site.unregister(User)
+if admin.site.is_registered(User):
+    admin.site.unregister(User)
 admin.site.register(User, UserAdmin)
 
-# Customize admin site headers
-admin.site.site_header = "VLAMy OCR Administration"
-admin.site.site_title = "VLAMy OCR Admin"
-admin.site.index_title = "OCR Application Management"
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class OcrAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ocr_app"
+
+    def ready(self):
+        from django.contrib import admin
+
+        # Customize admin site headers
+        admin.site.site_header = "VLAMy OCR Administration"
+        admin.site.site_title = "VLAMy OCR Admin"
+        admin.site.index_title = "OCR Application Management"
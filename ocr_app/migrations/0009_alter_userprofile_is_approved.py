@@ -0,0 +1,18 @@
+# Generated by Django 5.1.11 on 2026-10-16 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ocr_app", "0008_accountrequest"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="userprofile",
+            name="is_approved",
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.11 on 2026-10-16 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ocr_app", "0009_alter_userprofile_is_approved"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="image",
+            name="is_processed",
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AlterField(
+            model_name="transcription",
+            name="transcription_type",
+            field=models.CharField(
+                choices=[
+                    ("full_image", "Full Image"),
+                    ("annotation", "Specific Annotation"),
+                ],
+                db_index=True,
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transcription",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("processing", "Processing"),
+                    ("completed", "Completed"),
+                    ("failed", "Failed"),
+                ],
+                db_index=True,
+                default="pending",
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="exportjob",
+            name="export_type",
+            field=models.CharField(
+                choices=[
+                    ("image", "Single Image"),
+                    ("document", "Document"),
+                    ("project", "Project"),
+                ],
+                db_index=True,
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="exportjob",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("processing", "Processing"),
+                    ("completed", "Completed"),
+                    ("failed", "Failed"),
+                ],
+                db_index=True,
+                default="pending",
+                max_length=20,
+            ),
+        ),
+    ]
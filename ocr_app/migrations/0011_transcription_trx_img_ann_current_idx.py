@@ -0,0 +1,20 @@
+# Generated by Django 5.1.11 on 2026-10-16 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ocr_app", "0010_add_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transcription",
+            index=models.Index(
+                fields=["image", "annotation", "is_current"],
+                name="trx_img_ann_current_idx",
+            ),
+        ),
+    ]
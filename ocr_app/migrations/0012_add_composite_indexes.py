@@ -0,0 +1,25 @@
+# Generated by Django 5.1.11 on 2026-10-16 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ocr_app", "0011_transcription_trx_img_ann_current_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="projectpermission",
+            index=models.Index(
+                fields=["user", "permission"], name="projperm_user_perm_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="annotation",
+            index=models.Index(
+                fields=["image", "reading_order"], name="ann_image_order_idx"
+            ),
+        ),
+    ]
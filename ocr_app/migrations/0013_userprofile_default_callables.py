@@ -0,0 +1,38 @@
+# Generated by Django 5.1.11 on 2026-10-16 13:10
+
+import ocr_app.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ocr_app", "0012_add_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="userprofile",
+            name="custom_prompts",
+            field=models.JSONField(
+                default=ocr_app.models._default_prompts,
+                help_text="List of custom prompts with associated zones and metadata fields",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="userprofile",
+            name="enabled_line_types",
+            field=models.JSONField(
+                default=ocr_app.models._default_line_types,
+                help_text="List of enabled line types for annotation classification",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="userprofile",
+            name="enabled_zone_types",
+            field=models.JSONField(
+                default=ocr_app.models._default_zone_types,
+                help_text="List of enabled zone types for annotation classification",
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.11 on 2026-10-16 13:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_project(apps, schema_editor):
+    Document = apps.get_model("ocr_app", "Document")
+    Image = apps.get_model("ocr_app", "Image")
+    Annotation = apps.get_model("ocr_app", "Annotation")
+    Transcription = apps.get_model("ocr_app", "Transcription")
+
+    Image.objects.update(
+        project_id=Subquery(
+            Document.objects.filter(pk=OuterRef("document_id")).values("project_id")[:1]
+        )
+    )
+    image_project = Subquery(
+        Image.objects.filter(pk=OuterRef("image_id")).values("project_id")[:1]
+    )
+    Annotation.objects.update(project_id=image_project)
+    Transcription.objects.update(project_id=image_project)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ocr_app", "0013_userprofile_default_callables"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="image",
+            name="project",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="ocr_app.project",
+            ),
+        ),
+        migrations.AddField(
+            model_name="annotation",
+            name="project",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="ocr_app.project",
+            ),
+        ),
+        migrations.AddField(
+            model_name="transcription",
+            name="project",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="ocr_app.project",
+            ),
+        ),
+        migrations.RunPython(backfill_project, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.11 on 2026-10-16 13:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ocr_app", "0014_denormalize_project"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="image",
+            name="project",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="ocr_app.project",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="annotation",
+            name="project",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="ocr_app.project",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transcription",
+            name="project",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="ocr_app.project",
+            ),
+        ),
+    ]
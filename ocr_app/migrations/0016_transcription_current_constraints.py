@@ -0,0 +1,52 @@
+# Generated by Django 5.1.11 on 2026-10-16 13:50
+
+from django.db import migrations, models
+
+
+def retire_duplicate_current(apps, schema_editor):
+    """Keep only the newest current transcription per target"""
+    Transcription = apps.get_model("ocr_app", "Transcription")
+
+    seen = set()
+    stale_ids = []
+    current = Transcription.objects.filter(is_current=True).order_by(
+        "-version", "-created_at"
+    ).values_list("id", "image_id", "annotation_id")
+    for transcription_id, image_id, annotation_id in current.iterator():
+        key = ("annotation", annotation_id) if annotation_id else ("image", image_id)
+        if key in seen:
+            stale_ids.append(transcription_id)
+        else:
+            seen.add(key)
+
+    for start in range(0, len(stale_ids), 500):
+        Transcription.objects.filter(id__in=stale_ids[start:start + 500]).update(
+            is_current=False
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ocr_app", "0015_alter_project_not_null"),
+    ]
+
+    operations = [
+        migrations.RunPython(retire_duplicate_current, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="transcription",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("annotation__isnull", False), ("is_current", True)),
+                fields=("annotation",),
+                name="uniq_current_per_annotation",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="transcription",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("annotation__isnull", True), ("is_current", True)),
+                fields=("image",),
+                name="uniq_current_per_image",
+            ),
+        ),
+    ]
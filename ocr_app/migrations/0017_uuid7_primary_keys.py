@@ -0,0 +1,74 @@
+# Generated by Django 5.1.11 on 2026-10-16 14:05
+
+import ocr_app.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ocr_app", "0016_transcription_current_constraints"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="project",
+            name="id",
+            field=models.UUIDField(
+                default=ocr_app.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="document",
+            name="id",
+            field=models.UUIDField(
+                default=ocr_app.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="image",
+            name="id",
+            field=models.UUIDField(
+                default=ocr_app.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="annotation",
+            name="id",
+            field=models.UUIDField(
+                default=ocr_app.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transcription",
+            name="id",
+            field=models.UUIDField(
+                default=ocr_app.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="exportjob",
+            name="id",
+            field=models.UUIDField(
+                default=ocr_app.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+    ]
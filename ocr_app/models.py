@@ -1,10 +1,30 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.core.validators import FileExtensionValidator
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.core.exceptions import ValidationError
 import json
+import os
+import time
 import uuid
+from types import MappingProxyType
+
+
+def uuid7():
+    """Time-ordered UUID (RFC 9562 version 7) so new rows land at the end of the PK index"""
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), 'big')
+    value = (
+        (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80 |
+        0x7 << 76 |
+        (rand >> 68) << 64 |
+        0b10 << 62 |
+        (rand & 0x3FFF_FFFF_FFFF_FFFF)
+    )
+    return uuid.UUID(int=value)
 
 
 # Annotation classification constants based on Segmonto Ontology
@@ -36,7 +56,7 @@ LINE_TYPES = [
 ]
 
 # PageXML Region Type mappings
-PAGEXML_MAPPINGS = {
+PAGEXML_MAPPINGS = MappingProxyType({
     'CustomZone': 'CustomRegion',
     'DamageZone': 'NoiseRegion',
     'DigitizationArtefactZone': 'NoiseRegion',
@@ -58,9 +78,52 @@ PAGEXML_MAPPINGS = {
     'HeadingLine': 'TextLine',
     'InterlinearLine': 'TextLine',
     'MusicLine': 'TextLine',
+})
+
+# Classification codes for O(1) membership checks
+VALID_ZONE_TYPES = frozenset(code for code, _ in ZONE_TYPES)
+VALID_LINE_TYPES = frozenset(code for code, _ in LINE_TYPES)
+VALID_CLASSIFICATIONS = VALID_ZONE_TYPES | VALID_LINE_TYPES
+
+# Defaults for new user profiles
+DEFAULT_ZONE_TYPES = (
+    'MainZone', 'GraphicZone', 'TableZone', 'DropCapitalZone', 
+    'MusicZone', 'MarginTextZone', 'CustomZone'
+)
+DEFAULT_LINE_TYPES = (
+    'DefaultLine', 'HeadingLine', 'DropCapitalLine', 
+    'InterlinearLine', 'CustomLine'
+)
+DEFAULT_PROMPT = {
+    'id': 'default_main',
+    'name': 'Main Zone Default',
+    'prompt': 'Transcribe this text accurately, preserving formatting and structure.',
+    'zones': ('MainZone',),
+    'metadata_fields': (
+        {'name': 'handwritten', 'type': 'boolean', 'default': False},
+        {'name': 'typed', 'type': 'boolean', 'default': True},
+        {'name': 'language', 'type': 'string', 'default': 'en'}
+    ),
+    'is_default': True
 }
 
 
+def _default_zone_types():
+    return list(DEFAULT_ZONE_TYPES)
+
+
+def _default_line_types():
+    return list(DEFAULT_LINE_TYPES)
+
+
+def _default_prompts():
+    return [{
+        **DEFAULT_PROMPT,
+        'zones': list(DEFAULT_PROMPT['zones']),
+        'metadata_fields': [dict(field) for field in DEFAULT_PROMPT['metadata_fields']],
+    }]
+
+
 class AccountRequest(models.Model):
     """Model to store pending account requests"""
     STATUS_CHOICES = [
@@ -110,10 +173,19 @@ class AccountRequest(models.Model):
             raise ValidationError({'email': 'This email is already registered.'})
 
 
+class UserProfileQuerySet(models.QuerySet):
+    def light(self):
+        """Skip the JSON preference columns when only flags are needed"""
+        return self.defer(
+            'enabled_zone_types', 'enabled_line_types',
+            'custom_prompts', 'custom_detection_mappings'
+        )
+
+
 class UserProfile(models.Model):
     """Extended user profile for approval system and API credentials"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
-    is_approved = models.BooleanField(default=False)
+    is_approved = models.BooleanField(default=False, db_index=True)
     approval_requested_at = models.DateTimeField(auto_now_add=True)
     approved_by = models.ForeignKey(
         User, on_delete=models.SET_NULL, null=True, blank=True,
@@ -155,17 +227,17 @@ class UserProfile(models.Model):
     
     # Annotation preferences - which classification types are available for this user
     enabled_zone_types = models.JSONField(
-        default=list,
+        default=_default_zone_types,
         help_text="List of enabled zone types for annotation classification"
     )
     enabled_line_types = models.JSONField(
-        default=list,
+        default=_default_line_types,
         help_text="List of enabled line types for annotation classification"
     )
     
     # Custom prompts for transcription
     custom_prompts = models.JSONField(
-        default=list,
+        default=_default_prompts,
         help_text="List of custom prompts with associated zones and metadata fields"
     )
     
@@ -178,42 +250,15 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = UserProfileQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.user.username} - {'Approved' if self.is_approved else 'Pending'}"
-    
-    def save(self, *args, **kwargs):
-        """Override save to set default annotation types and prompts if empty"""
-        if not self.enabled_zone_types:
-            self.enabled_zone_types = [
-                'MainZone', 'GraphicZone', 'TableZone', 'DropCapitalZone', 
-                'MusicZone', 'MarginTextZone', 'CustomZone'
-            ]
-        if not self.enabled_line_types:
-            self.enabled_line_types = [
-                'DefaultLine', 'HeadingLine', 'DropCapitalLine', 
-                'InterlinearLine', 'CustomLine'
-            ]
-        if not self.custom_prompts:
-            self.custom_prompts = [
-                {
-                    'id': 'default_main',
-                    'name': 'Main Zone Default',
-                    'prompt': 'Transcribe this text accurately, preserving formatting and structure.',
-                    'zones': ['MainZone'],
-                    'metadata_fields': [
-                        {'name': 'handwritten', 'type': 'boolean', 'default': False},
-                        {'name': 'typed', 'type': 'boolean', 'default': True},
-                        {'name': 'language', 'type': 'string', 'default': 'en'}
-                    ],
-                    'is_default': True
-                }
-            ]
-        super().save(*args, **kwargs)
 
 
 class Project(models.Model):
     """Top-level project container"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_projects')
@@ -256,6 +301,9 @@ class ProjectPermission(models.Model):
     
     class Meta:
         unique_together = ['project', 'user']
+        indexes = [
+            models.Index(fields=['user', 'permission'], name='projperm_user_perm_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.permission} on {self.project.name}"
@@ -263,7 +311,7 @@ class ProjectPermission(models.Model):
 
 class Document(models.Model):
     """Document within a project, containing multiple images"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='documents')
@@ -298,13 +346,67 @@ class Document(models.Model):
     
     def __str__(self):
         return f"{self.name} (in {self.project.name})"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_project_id = instance.__dict__.get('project_id')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        moved = (
+            not self._state.adding
+            and (update_fields is None or 'project' in update_fields)
+            and self.project_id != getattr(self, '_loaded_project_id', None)
+        )
+        if not moved:
+            super().save(*args, **kwargs)
+            self._loaded_project_id = self.project_id
+            return
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Keep the denormalized project on descendants in step with moves
+            Image.objects.filter(document=self).exclude(
+                project_id=self.project_id
+            ).update(project_id=self.project_id)
+            Annotation.objects.filter(image__document=self).exclude(
+                project_id=self.project_id
+            ).update(project_id=self.project_id)
+            Transcription.objects.filter(image__document=self).exclude(
+                project_id=self.project_id
+            ).update(project_id=self.project_id)
+        self._loaded_project_id = self.project_id
+
+
+class ImageQuerySet(models.QuerySet):
+    def with_counts(self):
+        """Annotate annotation/transcription counts and the current-transcription flag"""
+        def count_of(model):
+            counts = model.objects.filter(image=OuterRef('pk')).order_by().values(
+                'image'
+            ).annotate(total=Count('pk')).values('total')
+            return Coalesce(Subquery(counts, output_field=models.IntegerField()), 0)
+        
+        return self.annotate(
+            annotation_total=count_of(Annotation),
+            transcription_total=count_of(Transcription),
+            has_current_total=Exists(
+                Transcription.objects.filter(
+                    image=OuterRef('pk'), is_current=True, annotation__isnull=True
+                )
+            )
+        )
 
 
 class Image(models.Model):
     """Individual image within a document"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=255)
     document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='images')
+    # Denormalized from document.project so permission checks skip the joins
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+', editable=False)
     
     # Image file
     image_file = models.ImageField(
@@ -319,7 +421,7 @@ class Image(models.Model):
     height = models.PositiveIntegerField()
     
     # Processing status
-    is_processed = models.BooleanField(default=False)
+    is_processed = models.BooleanField(default=False, db_index=True)
     processing_error = models.TextField(blank=True)
     
     # Order within document
@@ -328,23 +430,121 @@ class Image(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ImageQuerySet.as_manager()
+    
     class Meta:
         ordering = ['order', 'created_at']
         unique_together = ['document', 'order']
     
     def __str__(self):
         return f"{self.name} (in {self.document.name})"
+    
+    # Counts use the values from Image.objects.with_counts() when annotated
+    @cached_property
+    def annotation_count(self):
+        if hasattr(self, 'annotation_total'):
+            return self.annotation_total
+        return self.annotations.count()
+    
+    @cached_property
+    def transcription_count(self):
+        if hasattr(self, 'transcription_total'):
+            return self.transcription_total
+        return self.transcriptions.count()
+    
+    @cached_property
+    def has_current_transcription(self):
+        if hasattr(self, 'has_current_total'):
+            return self.has_current_total
+        return self.transcriptions.filter(is_current=True, annotation__isnull=True).exists()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_document_id = instance.__dict__.get('document_id')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        # The project only needs re-deriving for new rows or a document change
+        if (update_fields is not None and 'document' not in update_fields) or not (
+            self._state.adding or self.project_id is None
+            or self.document_id != getattr(self, '_loaded_document_id', None)
+        ):
+            super().save(*args, **kwargs)
+            self._loaded_document_id = self.document_id
+            return
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'project'}
+        
+        project_id = self.document.project_id
+        moved = not self._state.adding and project_id != self.project_id
+        self.project_id = project_id
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if moved:
+                Annotation.objects.filter(image=self).update(project_id=project_id)
+                Transcription.objects.filter(image=self).update(project_id=project_id)
+        self._loaded_document_id = self.document_id
+
+
+class ImageProjectMixin:
+    """
+    Keeps the denormalized project in step with the image. The project is
+    only looked up for new rows or when the image changes, so saving an
+    existing row doesn't fetch its image.
+    """
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_image_id = instance.__dict__.get('image_id')
+        return instance
+    
+    def _sync_project(self, kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'image' not in update_fields:
+            return
+        if (self._state.adding or self.project_id is None
+                or self.image_id != getattr(self, '_loaded_image_id', None)):
+            self.project_id = self.image.project_id
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'project'}
+    
+    def _mark_image_loaded(self):
+        self._loaded_image_id = self.image_id
+
+
+class AnnotationManager(models.Manager):
+    """Manager with a batched path for creating annotations"""
+    
+    def bulk_create_for_image(self, image, rows, user, batch_size=1000):
+        """
+        Create annotations on one image from a list of field dicts.
+        
+        The rows go in through bulk_create, so save() and model validation
+        are skipped. The image and project are set on every row.
+        """
+        annotations = [
+            self.model(image=image, project_id=image.project_id, created_by=user, **row)
+            for row in rows
+        ]
+        with transaction.atomic():
+            return self.bulk_create(annotations, batch_size=batch_size)
 
 
-class Annotation(models.Model):
+class Annotation(ImageProjectMixin, models.Model):
     """Bounding boxes and polygons on images"""
     ANNOTATION_TYPES = [
         ('bbox', 'Bounding Box'),
         ('polygon', 'Polygon'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     image = models.ForeignKey(Image, on_delete=models.CASCADE, related_name='annotations')
+    # Denormalized from image.project so permission checks skip the joins
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+', editable=False)
     annotation_type = models.CharField(max_length=10, choices=ANNOTATION_TYPES)
     
     # Coordinates stored as JSON
@@ -375,21 +575,29 @@ class Annotation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = AnnotationManager()
+    
     class Meta:
         ordering = ['reading_order', 'created_at']
+        indexes = [
+            models.Index(fields=['image', 'reading_order'], name='ann_image_order_idx'),
+        ]
     
     def __str__(self):
         classification_str = f" ({self.classification})" if self.classification else ""
         return f"{self.annotation_type}{classification_str} on {self.image.name}"
     
+    def save(self, *args, **kwargs):
+        self._sync_project(kwargs)
+        super().save(*args, **kwargs)
+        self._mark_image_loaded()
+    
     def get_pagexml_region_type(self):
         """Get the corresponding PageXML region type for this annotation's classification"""
-        if self.classification and self.classification in PAGEXML_MAPPINGS:
-            return PAGEXML_MAPPINGS[self.classification]
-        return 'UnknownRegion'
+        return PAGEXML_MAPPINGS.get(self.classification, 'UnknownRegion')
 
 
-class Transcription(models.Model):
+class Transcription(ImageProjectMixin, models.Model):
     """OCR transcription results with version history"""
     TRANSCRIPTION_TYPES = [
         ('full_image', 'Full Image'),
@@ -403,21 +611,23 @@ class Transcription(models.Model):
         ('failed', 'Failed'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     image = models.ForeignKey(Image, on_delete=models.CASCADE, related_name='transcriptions')
     annotation = models.ForeignKey(
         Annotation, on_delete=models.CASCADE, null=True, blank=True,
         related_name='transcriptions'
     )
+    # Denormalized from image.project so permission checks skip the joins
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+', editable=False)
     
-    transcription_type = models.CharField(max_length=20, choices=TRANSCRIPTION_TYPES)
+    transcription_type = models.CharField(max_length=20, choices=TRANSCRIPTION_TYPES, db_index=True)
     
     # API details
     api_endpoint = models.CharField(max_length=255)  # 'openai' or custom URL
     api_model = models.CharField(max_length=100, blank=True)  # e.g., 'gpt-4-vision-preview'
     
     # Results
-    status = models.CharField(max_length=20, choices=TRANSCRIPTION_STATUS, default='pending')
+    status = models.CharField(max_length=20, choices=TRANSCRIPTION_STATUS, default='pending', db_index=True)
     text_content = models.TextField(blank=True)
     confidence_score = models.FloatField(null=True, blank=True)
     
@@ -442,20 +652,40 @@ class Transcription(models.Model):
     
     class Meta:
         ordering = ['-version', '-created_at']
+        indexes = [
+            models.Index(fields=['image', 'annotation', 'is_current'], name='trx_img_ann_current_idx'),
+        ]
+        constraints = [
+            # At most one current transcription per annotation, and per image
+            # for full-image transcriptions. The partial unique indexes also
+            # serve the current-transcription lookups for one target.
+            models.UniqueConstraint(
+                fields=['annotation'], condition=Q(is_current=True, annotation__isnull=False),
+                name='uniq_current_per_annotation'
+            ),
+            models.UniqueConstraint(
+                fields=['image'], condition=Q(is_current=True, annotation__isnull=True),
+                name='uniq_current_per_image'
+            ),
+        ]
     
     def save(self, *args, **kwargs):
-        if self.is_current:
-            # Ensure only one current transcription per image/annotation combination
-            if self.annotation:
-                Transcription.objects.filter(
-                    annotation=self.annotation, is_current=True
-                ).exclude(id=self.id).update(is_current=False)
-            else:
-                Transcription.objects.filter(
-                    image=self.image, annotation__isnull=True, is_current=True
-                ).exclude(id=self.id).update(is_current=False)
+        self._sync_project(kwargs)
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if self.is_current:
+                # Ensure only one current transcription per image/annotation combination
+                if self.annotation_id:
+                    Transcription.objects.filter(
+                        annotation_id=self.annotation_id, is_current=True
+                    ).exclude(id=self.id).update(is_current=False)
+                else:
+                    Transcription.objects.filter(
+                        image_id=self.image_id, annotation__isnull=True, is_current=True
+                    ).exclude(id=self.id).update(is_current=False)
+            
+            super().save(*args, **kwargs)
+        self._mark_image_loaded()
     
     def __str__(self):
         target = self.annotation or self.image
@@ -483,10 +713,10 @@ class ExportJob(models.Model):
         ('failed', 'Failed'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    export_type = models.CharField(max_length=20, choices=EXPORT_TYPES)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    export_type = models.CharField(max_length=20, choices=EXPORT_TYPES, db_index=True)
     export_format = models.CharField(max_length=20, choices=EXPORT_FORMATS)
-    status = models.CharField(max_length=20, choices=EXPORT_STATUS, default='pending')
+    status = models.CharField(max_length=20, choices=EXPORT_STATUS, default='pending', db_index=True)
     
     # What to export
     project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True)
@@ -516,8 +746,3 @@ from django.dispatch import receiver
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
-
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
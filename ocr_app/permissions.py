@@ -1,5 +1,61 @@
+from django.db.models import Q
 from rest_framework import permissions
 
+from .models import (
+    UserProfile, Project, Document, Image, Annotation, Transcription, ExportJob
+)
+
+
+# Project (and project id) lookups per model, so checks skip hasattr probing
+_PROJECT_RESOLVER = {
+    Project: lambda obj: obj,
+    Document: lambda obj: obj.project,
+    Image: lambda obj: obj.project,
+    Annotation: lambda obj: obj.project,
+    Transcription: lambda obj: obj.project,
+}
+
+_PROJECT_ID_RESOLVER = {
+    Project: lambda obj: obj.id,
+    Document: lambda obj: obj.project_id,
+    Image: lambda obj: obj.project_id,
+    Annotation: lambda obj: obj.project_id,
+    Transcription: lambda obj: obj.project_id,
+}
+
+
+def _resolve(resolvers, obj):
+    """Apply the resolver for the object's class, or its nearest base (proxies, subclasses)"""
+    for cls in type(obj).__mro__:
+        resolver = resolvers.get(cls)
+        if resolver is not None:
+            return resolver(obj)
+    return None
+
+
+def _project_for(obj):
+    """Resolve the Project an object belongs to, or None if it has none"""
+    return _resolve(_PROJECT_RESOLVER, obj)
+
+
+def _project_id_for(obj):
+    """Resolve the id of the Project an object belongs to without loading it"""
+    return _resolve(_PROJECT_ID_RESOLVER, obj)
+
+
+def user_can_view_project(user, project_id):
+    """Check owner or shared access to a project in one query without loading it"""
+    return Project.objects.filter(
+        Q(owner=user) | Q(shared_with=user), id=project_id
+    ).exists()
+
+
+def _is_shared_with(project, user):
+    """Check shared access, using prefetched shared_with rows when available"""
+    if 'shared_with' in getattr(project, '_prefetched_objects_cache', {}):
+        return user.id in {u.id for u in project.shared_with.all()}
+    return project.shared_with.filter(id=user.id).exists()
+
 
 class IsApprovedUser(permissions.BasePermission):
     """
@@ -11,15 +67,21 @@ class IsApprovedUser(permissions.BasePermission):
         if not request.user or not request.user.is_authenticated:
             return False
         
+        # Resolve approval once per request; views may check it more than once
+        is_approved = getattr(request, '_is_approved', None)
+        if is_approved is None:
+            is_approved = request._is_approved = self._resolve_approval(request.user)
+        return is_approved
+    
+    def _resolve_approval(self, user):
         # Allow staff/admin users regardless of approval status
-        if request.user.is_staff or request.user.is_superuser:
+        if user.is_staff or user.is_superuser:
             return True
         
-        # Check if user has a profile and is approved
-        if hasattr(request.user, 'profile'):
-            return request.user.profile.is_approved
-        
-        return False
+        # Use the profile if it is already loaded, otherwise read only the flag
+        if user._state.fields_cache.get('profile') is not None:
+            return user.profile.is_approved
+        return UserProfile.objects.filter(user=user, is_approved=True).exists()
 
 
 class IsOwnerOrSharedUser(permissions.BasePermission):
@@ -28,42 +90,23 @@ class IsOwnerOrSharedUser(permissions.BasePermission):
     """
     
     def has_object_permission(self, request, view, obj):
-        # Check different object types and their ownership/sharing rules
-        
-        # For Project objects
-        if hasattr(obj, 'owner'):  # Project
-            if obj.owner == request.user:
-                return True
-            # Check if user has shared access
-            return obj.shared_with.filter(id=request.user.id).exists()
-        
-        # For Document objects
-        elif hasattr(obj, 'project'):  # Document
-            project = obj.project
-            if project.owner == request.user:
-                return True
-            # Check if user has shared access
-            return project.shared_with.filter(id=request.user.id).exists()
-        
-        # For Image objects (through document -> project)
-        elif hasattr(obj, 'document'):  # Image
-            project = obj.document.project
-            if project.owner == request.user:
-                return True
-            # Check if user has shared access
-            return project.shared_with.filter(id=request.user.id).exists()
+        # Use the per-request id set when the view provides one
+        viewable = getattr(request, '_viewable_project_ids', None)
+        project_id = _project_id_for(obj)
+        if viewable is not None and project_id is not None:
+            return project_id in viewable
         
-        # For Annotation, Transcription objects (through image -> document -> project)
-        elif hasattr(obj, 'image'):  # Annotation, Transcription
-            project = obj.image.document.project
-            if project.owner == request.user:
+        # Project, Document, Image, Annotation, Transcription objects
+        project = _project_for(obj)
+        if project is not None:
+            if project.owner_id == request.user.id:
                 return True
             # Check if user has shared access
-            return project.shared_with.filter(id=request.user.id).exists()
+            return _is_shared_with(project, request.user)
         
         # For ExportJob objects
-        elif hasattr(obj, 'requested_by'):  # ExportJob
-            return obj.requested_by == request.user
+        if isinstance(obj, ExportJob):
+            return obj.requested_by_id == request.user.id
         
         # Default to False if we can't determine ownership
         return False
@@ -75,24 +118,22 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
     """
     
     def has_object_permission(self, request, view, obj):
-        # Read permissions for any authenticated user with access
-        if request.method in permissions.SAFE_METHODS:
-            return IsOwnerOrSharedUser().has_object_permission(request, view, obj)
+        user_id = request.user.id
+        project = _project_for(obj)
+        if project is None:
+            # ExportJob objects
+            return isinstance(obj, ExportJob) and obj.requested_by_id == user_id
+        
+        # Owners can read and write
+        if project.owner_id == user_id:
+            return True
         
-        # Write permissions only for owners
-        if hasattr(obj, 'owner'):  # Project
-            return obj.owner == request.user
-        elif hasattr(obj, 'project'):  # Document
-            project = obj.project
-            return project.owner == request.user
-        elif hasattr(obj, 'document'):  # Image
-            project = obj.document.project
-            return project.owner == request.user
-        elif hasattr(obj, 'image'):  # Annotation, Transcription
-            project = obj.image.document.project
-            return project.owner == request.user
-        elif hasattr(obj, 'requested_by'):  # ExportJob
-            return obj.requested_by == request.user
+        # Read permissions for users with shared access
+        if request.method in permissions.SAFE_METHODS:
+            viewable = getattr(request, '_viewable_project_ids', None)
+            if viewable is not None:
+                return project.id in viewable
+            return _is_shared_with(project, request.user)
         
         return False
 
@@ -103,24 +144,27 @@ class CanEditProject(permissions.BasePermission):
     """
     
     def has_object_permission(self, request, view, obj):
+        # Use the per-request id set when the view provides one
+        editable = getattr(request, '_editable_project_ids', None)
+        project_id = _project_id_for(obj)
+        if editable is not None and project_id is not None:
+            return project_id in editable
+        
         # Get the project from different object types
-        if hasattr(obj, 'owner'):  # Project
-            project = obj
-        elif hasattr(obj, 'project'):  # Document
-            project = obj.project
-        elif hasattr(obj, 'document'):  # Image
-            project = obj.document.project
-        elif hasattr(obj, 'image'):  # Annotation, Transcription
-            project = obj.image.document.project
-        else:
+        project = _project_for(obj)
+        if project is None:
             return False
         
         # Owner can always edit
-        if project.owner == request.user:
+        if project.owner_id == request.user.id:
             return True
         
+        # Use the user's permission rows prefetched onto the project
+        if hasattr(project, '_my_perms'):
+            return any(p.permission in ('edit', 'admin') for p in project._my_perms)
+        
         # Check for edit or admin permissions
         return project.projectpermission_set.filter(
             user=request.user,
             permission__in=['edit', 'admin']
-        ).exists() 
\ No newline at end of file
+        ).exists()
@@ -0,0 +1,27 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson.
+    
+    Types orjson can't encode natively (lazy strings, Decimals, querysets)
+    go through DRF's encoder. Falls back to JSONRenderer when indented
+    output is requested.
+    """
+    _encoder_default = JSONEncoder().default
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        
+        if data is None:
+            return b''
+        
+        return orjson.dumps(
+            data,
+            default=self._encoder_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        )
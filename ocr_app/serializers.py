@@ -1,8 +1,11 @@
+from functools import cached_property
+
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth.hashers import make_password
 from django.core.exceptions import ValidationError
+from django.db.models import Q
 from .models import (
     AccountRequest, UserProfile, Project, ProjectPermission, Document, 
     Image, Annotation, Transcription, ExportJob
@@ -71,6 +74,15 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'date_joined', 'is_staff']
         read_only_fields = ['id', 'date_joined', 'is_staff']
+    
+    def to_representation(self, instance):
+        # The same user (usually the creator) recurs across nested rows,
+        # so serialize each one once per serializer tree
+        cache = self.context.setdefault('_user_cache', {})
+        data = cache.get(instance.pk)
+        if data is None:
+            data = cache[instance.pk] = super().to_representation(instance)
+        return data
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -135,10 +147,55 @@ class ProjectListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'owner', 'created_at', 'updated_at']
     
     def get_document_count(self, obj):
+        # Use the count annotated by the viewset queryset when present
+        if hasattr(obj, 'document_total'):
+            return obj.document_total
         return obj.documents.count()
     
     def get_image_count(self, obj):
-        return sum(doc.images.count() for doc in obj.documents.all())
+        if hasattr(obj, 'image_total'):
+            return obj.image_total
+        return Image.objects.filter(document__project=obj).count()
+
+
+PROJECT_LIST_VALUES = (
+    'id', 'name', 'description', 'is_public', 'order', 'document_total', 'image_total',
+    'created_at', 'updated_at', 'owner__id', 'owner__username', 'owner__email',
+    'owner__first_name', 'owner__last_name', 'owner__date_joined', 'owner__is_staff',
+)
+
+
+def project_list_serialize(rows):
+    """
+    Build ProjectListSerializer-shaped dicts from PROJECT_LIST_VALUES rows.
+    
+    Used for the read-only list endpoint, where the full serializer
+    machinery per row buys nothing.
+    """
+    to_datetime = serializers.DateTimeField().to_representation
+    return [
+        {
+            'id': str(row['id']),
+            'name': row['name'],
+            'description': row['description'],
+            'owner': {
+                'id': row['owner__id'],
+                'username': row['owner__username'],
+                'email': row['owner__email'],
+                'first_name': row['owner__first_name'],
+                'last_name': row['owner__last_name'],
+                'date_joined': to_datetime(row['owner__date_joined']),
+                'is_staff': row['owner__is_staff'],
+            },
+            'is_public': row['is_public'],
+            'order': row['order'],
+            'document_count': row['document_total'],
+            'image_count': row['image_total'],
+            'created_at': to_datetime(row['created_at']),
+            'updated_at': to_datetime(row['updated_at']),
+        }
+        for row in rows
+    ]
 
 
 class ProjectDetailSerializer(ProjectListSerializer):
@@ -166,19 +223,52 @@ class DocumentListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_image_count(self, obj):
+        if hasattr(obj, 'image_total'):
+            return obj.image_total
         return obj.images.count()
     
     def validate_project_id(self, value):
         user = self.context['request'].user
-        try:
-            project = Project.objects.get(id=value)
-            if project.owner != user and not project.projectpermission_set.filter(
-                user=user, permission__in=['edit', 'admin']
-            ).exists():
-                raise serializers.ValidationError("You don't have permission to create documents in this project.")
+        # Check existence and edit access in one query
+        if Project.objects.filter(
+            Q(owner=user) |
+            Q(projectpermission__user=user, projectpermission__permission__in=['edit', 'admin']),
+            id=value
+        ).exists():
             return value
-        except Project.DoesNotExist:
+        
+        # Only failed checks pay for telling the two errors apart
+        if not Project.objects.filter(id=value).exists():
             raise serializers.ValidationError("Project not found.")
+        raise serializers.ValidationError("You don't have permission to create documents in this project.")
+
+
+BBOX_FIELDS = ('x', 'y', 'width', 'height')
+
+
+def _validate_bbox(value):
+    """Check a bbox dict has numeric x, y, width and height"""
+    try:
+        coords = [value[field] for field in BBOX_FIELDS]
+    except (KeyError, TypeError):
+        raise serializers.ValidationError(
+            f"Bounding box requires: {', '.join(BBOX_FIELDS)}"
+        )
+    for coord in coords:
+        if not isinstance(coord, (int, float)):
+            raise serializers.ValidationError("All coordinates must be numbers")
+
+
+def _validate_polygon(value):
+    """Check a polygon dict has at least 3 points with x and y"""
+    points = value.get('points') if isinstance(value, dict) else None
+    if not isinstance(points, list):
+        raise serializers.ValidationError("Polygon requires 'points' array")
+    if len(points) < 3:
+        raise serializers.ValidationError("Polygon must have at least 3 points")
+    for point in points:
+        if not isinstance(point, dict) or 'x' not in point or 'y' not in point:
+            raise serializers.ValidationError("Each point must have 'x' and 'y' coordinates")
 
 
 class AnnotationSerializer(serializers.ModelSerializer):
@@ -196,22 +286,9 @@ class AnnotationSerializer(serializers.ModelSerializer):
         annotation_type = self.initial_data.get('annotation_type')
         
         if annotation_type == 'bbox':
-            required_fields = ['x', 'y', 'width', 'height']
-            if not all(field in value for field in required_fields):
-                raise serializers.ValidationError(
-                    f"Bounding box requires: {', '.join(required_fields)}"
-                )
-            if any(not isinstance(value[field], (int, float)) for field in required_fields):
-                raise serializers.ValidationError("All coordinates must be numbers")
-        
+            _validate_bbox(value)
         elif annotation_type == 'polygon':
-            if 'points' not in value or not isinstance(value['points'], list):
-                raise serializers.ValidationError("Polygon requires 'points' array")
-            if len(value['points']) < 3:
-                raise serializers.ValidationError("Polygon must have at least 3 points")
-            for point in value['points']:
-                if not isinstance(point, dict) or 'x' not in point or 'y' not in point:
-                    raise serializers.ValidationError("Each point must have 'x' and 'y' coordinates")
+            _validate_polygon(value)
         
         return value
 
@@ -236,9 +313,9 @@ class TranscriptionSerializer(serializers.ModelSerializer):
 class ImageListSerializer(serializers.ModelSerializer):
     document = serializers.StringRelatedField(read_only=True)
     document_id = serializers.SerializerMethodField()
-    annotation_count = serializers.SerializerMethodField()
-    transcription_count = serializers.SerializerMethodField()
-    has_current_transcription = serializers.SerializerMethodField()
+    annotation_count = serializers.IntegerField(read_only=True)
+    transcription_count = serializers.IntegerField(read_only=True)
+    has_current_transcription = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = Image
@@ -254,16 +331,7 @@ class ImageListSerializer(serializers.ModelSerializer):
         ]
 
     def get_document_id(self, obj):
-        return str(obj.document.id)
-    
-    def get_annotation_count(self, obj):
-        return obj.annotations.count()
-    
-    def get_transcription_count(self, obj):
-        return obj.transcriptions.count()
-    
-    def get_has_current_transcription(self, obj):
-        return obj.transcriptions.filter(is_current=True, annotation__isnull=True).exists()
+        return str(obj.document_id)
 
 
 class ImageDetailSerializer(ImageListSerializer):
@@ -275,10 +343,18 @@ class ImageDetailSerializer(ImageListSerializer):
         fields = ImageListSerializer.Meta.fields + ['annotations', 'current_transcription', 'transcription_history']
     
     def get_current_transcription(self, obj):
-        current = obj.transcriptions.filter(is_current=True, annotation__isnull=True).first()
+        if hasattr(obj, 'current_transcriptions'):
+            current = obj.current_transcriptions[0] if obj.current_transcriptions else None
+        else:
+            current = obj.transcriptions.filter(is_current=True, annotation__isnull=True).first()
         if current:
-            return TranscriptionSerializer(current).data
+            return self._transcription_serializer.to_representation(current)
         return None
+    
+    @cached_property
+    def _transcription_serializer(self):
+        # Built once per serializer so each image skips field binding
+        return TranscriptionSerializer(context=self.context)
 
 
 class DocumentDetailSerializer(DocumentListSerializer):
@@ -290,9 +366,9 @@ class DocumentDetailSerializer(DocumentListSerializer):
 
 class ExportJobSerializer(serializers.ModelSerializer):
     requested_by = UserSerializer(read_only=True)
-    project_name = serializers.SerializerMethodField()
-    document_name = serializers.SerializerMethodField()
-    image_name = serializers.SerializerMethodField()
+    project_name = serializers.CharField(source='project.name', read_only=True, allow_null=True)
+    document_name = serializers.CharField(source='document.name', read_only=True, allow_null=True)
+    image_name = serializers.CharField(source='image.name', read_only=True, allow_null=True)
     
     class Meta:
         model = ExportJob
@@ -306,32 +382,28 @@ class ExportJobSerializer(serializers.ModelSerializer):
             'requested_by', 'created_at', 'completed_at'
         ]
     
-    def get_project_name(self, obj):
-        return obj.project.name if obj.project else None
-    
-    def get_document_name(self, obj):
-        return obj.document.name if obj.document else None
-    
-    def get_image_name(self, obj):
-        return obj.image.name if obj.image else None
+    # Target bit and mismatch message per export type
+    TARGET_MASKS = {
+        'project': (0b100, "Project must be specified for project export."),
+        'document': (0b010, "Document must be specified for document export."),
+        'image': (0b001, "Image must be specified for image export."),
+    }
     
     def validate(self, attrs):
-        export_type = attrs.get('export_type')
+        mask = (
+            (attrs.get('project') is not None) << 2 |
+            (attrs.get('document') is not None) << 1 |
+            (attrs.get('image') is not None)
+        )
         
         # Ensure exactly one target is specified
-        targets = [attrs.get('project'), attrs.get('document'), attrs.get('image')]
-        non_null_targets = [t for t in targets if t is not None]
-        
-        if len(non_null_targets) != 1:
+        if mask not in (0b100, 0b010, 0b001):
             raise serializers.ValidationError("Exactly one of project, document, or image must be specified.")
         
         # Validate export_type matches the target
-        if export_type == 'project' and not attrs.get('project'):
-            raise serializers.ValidationError("Project must be specified for project export.")
-        elif export_type == 'document' and not attrs.get('document'):
-            raise serializers.ValidationError("Document must be specified for document export.")
-        elif export_type == 'image' and not attrs.get('image'):
-            raise serializers.ValidationError("Image must be specified for image export.")
+        expected = self.TARGET_MASKS.get(attrs.get('export_type'))
+        if expected is not None and mask != expected[0]:
+            raise serializers.ValidationError(expected[1])
         
         return attrs
 
@@ -1,24 +1,116 @@
 import os
+import re
 import json
 import base64
+import gzip
+import hashlib
 import zipfile
 import requests
+import shutil
 import tempfile
 import uuid
 import xml.etree.ElementTree as ET
 from io import BytesIO
 from datetime import datetime
 from xml.dom import minidom
+import orjson
+from lxml import etree
 from PIL import Image as PILImage, ImageDraw
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.template.loader import render_to_string
 import logging
 
+from .models import PAGEXML_MAPPINGS
+
 
 logger = logging.getLogger('ocr_app')
 
+# (connect, read) timeouts for OCR API calls
+OCR_HTTP_TIMEOUT = (5, 60)
+
+# How long transcription results are reused for identical regions (seconds)
+OCR_CACHE_TIMEOUT = 7 * 86400
+
+
+def _build_http_session():
+    """
+    Create a pooled session that keeps connections alive between OCR calls.
+    
+    OCR requests are billed, non-idempotent POSTs, so they are only retried
+    when the server cannot have processed them: failed connects, and 429/503
+    responses (honouring Retry-After). Read timeouts and other 5xx responses
+    are never replayed.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            connect=3,
+            read=0,
+            status=2,
+            backoff_factor=0.3,
+            status_forcelist=[429, 503],
+            allowed_methods=frozenset(['GET', 'POST']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        ),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+_SESSION = _build_http_session()
+
+
+def _dumps_json(data):
+    """
+    Serialize export data to indented UTF-8 JSON bytes with orjson, which
+    encodes UUIDs and datetimes natively
+    """
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+
+def _write_json(filepath, data):
+    """Write export data to a JSON file"""
+    with open(filepath, 'wb') as f:
+        f.write(_dumps_json(data))
+
+
+# Deflate level for the XML/JSON entries of export archives; images are stored as-is
+EXPORT_ZIP_COMPRESSLEVEL = 1
+
+# Characters not allowed in exported file and folder names
+INVALID_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+
+# Region types whose annotation transcription is exported as a TextLine
+TEXT_LINE_REGION_TYPES = frozenset({'TextRegion', 'CustomRegion'})
+
+# PAGE content schema used by the PageXML exports
+PAGE_NS = "http://schema.primaresearch.org/PAGE/gts/pagecontent/2013-07-15"
+XSI_NS = "http://www.w3.org/2001/XMLSchema-instance"
+PAGE_SCHEMA_LOCATION = f"{PAGE_NS} {PAGE_NS}/pagecontent.xsd"
+
+# Characters outside the XML 1.0 Char production, which lxml refuses to write
+INVALID_XML_CHARS = re.compile('[^\t\n\r\u0020-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]')
+
+
+def _page_tag(name):
+    """Qualify an element name with the PAGE namespace"""
+    return f"{{{PAGE_NS}}}{name}"
+
+
+def _xml_safe(value):
+    """Drop characters that cannot appear in XML text or attribute values"""
+    return INVALID_XML_CHARS.sub('', value)
+
 
 class RoboflowDetectionService:
     """Service for detecting zones and lines using Roboflow API"""
@@ -165,17 +257,15 @@ class RoboflowDetectionService:
         Returns:
             str: Mapped classification for our system
         """
-        from .models import ZONE_TYPES, LINE_TYPES
+        from .models import VALID_ZONE_TYPES, VALID_LINE_TYPES
         
         # First, check for direct matches with our existing zone/line types
         # Roboflow often returns exact matches like "MainZone", "StampZone", etc.
         if detection_type == 'zone':
-            zone_values = [code for code, label in ZONE_TYPES]
-            if original_class in zone_values:
+            if original_class in VALID_ZONE_TYPES:
                 return original_class
         else:  # detection_type == 'line'
-            line_values = [code for code, label in LINE_TYPES]
-            if original_class in line_values:
+            if original_class in VALID_LINE_TYPES:
                 return original_class
         
         # Second, check user's custom detection mappings
@@ -239,6 +329,10 @@ class OCRService:
         """
         Transcribe a full image using specified API endpoint
         """
+        self._require_credentials(
+            api_endpoint, api_key, vertex_access_token, vertex_project_id, vertex_location
+        )
+        
         if api_endpoint == 'openai':
             return self._transcribe_with_openai(image_path, api_key, api_model)
         elif api_endpoint == 'vertex':
@@ -254,48 +348,100 @@ class OCRService:
     def transcribe_annotation(self, image_path, annotation, api_endpoint, api_key=None, custom_auth=None, 
                             api_model=None, custom_prompt=None, expected_metadata=None, 
                             use_structured_output=False, metadata_schema=None,
-                            vertex_access_token=None, vertex_project_id=None, vertex_location=None, vertex_model=None):
+                            vertex_access_token=None, vertex_project_id=None, vertex_location=None, vertex_model=None,
+                            refresh=False):
+        """
+        Transcribe a specific annotation region from an image with custom prompts and metadata extraction.
+        Pass refresh=True to skip the cached result for this region and store a new one.
         """
-        Transcribe a specific annotation region from an image with custom prompts and metadata extraction
+        # Extract the region from the image as in-memory JPEG bytes
+        region_bytes = self._extract_annotation_region(image_path, annotation)
+        
+        return self._transcribe_region(
+            region_bytes, api_endpoint, api_key=api_key, custom_auth=custom_auth,
+            api_model=api_model, custom_prompt=custom_prompt, expected_metadata=expected_metadata,
+            use_structured_output=use_structured_output, metadata_schema=metadata_schema,
+            vertex_access_token=vertex_access_token, vertex_project_id=vertex_project_id,
+            vertex_location=vertex_location, vertex_model=vertex_model, refresh=refresh
+        )
+    
+    def _transcribe_region(self, region_bytes, api_endpoint, api_key=None, custom_auth=None,
+                           api_model=None, custom_prompt=None, expected_metadata=None,
+                           use_structured_output=False, metadata_schema=None,
+                           vertex_access_token=None, vertex_project_id=None, vertex_location=None, vertex_model=None,
+                           refresh=False):
+        """
+        Transcribe an already extracted region with the selected API endpoint,
+        reusing a cached result for identical region bytes, request options
+        and credentials unless refresh is set
         """
-        # Extract the region from the image
-        region_image_path = self._extract_annotation_region(image_path, annotation)
+        # Validate before the lookup so missing credentials never get a cached result
+        self._require_credentials(
+            api_endpoint, api_key, vertex_access_token, vertex_project_id, vertex_location
+        )
         
-        try:
-            # Transcribe the extracted region
-            if api_endpoint == 'openai':
-                result = self._transcribe_with_openai(
-                    region_image_path, api_key, api_model, custom_prompt, 
-                    use_structured_output, metadata_schema
-                )
-            elif api_endpoint == 'vertex':
-                result = self._transcribe_with_vertex(
-                    region_image_path, vertex_access_token, vertex_project_id, 
-                    vertex_location, vertex_model, custom_prompt, expected_metadata
-                )
-            else:
-                result = self._transcribe_with_custom_endpoint(
-                    region_image_path, api_endpoint, custom_auth, api_model, 
-                    custom_prompt, expected_metadata
-                )
-            
-            # Clean up temporary file
-            if os.path.exists(region_image_path):
-                os.remove(region_image_path)
-            
-            return result
-            
-        except Exception as e:
-            # Clean up temporary file even if transcription fails
-            if os.path.exists(region_image_path):
-                os.remove(region_image_path)
-            raise e
+        # The credentials are part of the hashed key, so results are only
+        # shared between requests made with the same key or token
+        cache_key = self._ocr_cache_key(region_bytes, [
+            api_endpoint, api_model, vertex_model, vertex_project_id, vertex_location,
+            custom_prompt, expected_metadata, use_structured_output, metadata_schema,
+            api_key, custom_auth, vertex_access_token
+        ])
+        if not refresh:
+            result = cache.get(cache_key)
+            if result is not None:
+                return result
+        
+        if api_endpoint == 'openai':
+            result = self._transcribe_with_openai(
+                region_bytes, api_key, api_model, custom_prompt, 
+                use_structured_output, metadata_schema
+            )
+        elif api_endpoint == 'vertex':
+            result = self._transcribe_with_vertex(
+                region_bytes, vertex_access_token, vertex_project_id, 
+                vertex_location, vertex_model, custom_prompt, expected_metadata
+            )
+        else:
+            result = self._transcribe_with_custom_endpoint(
+                region_bytes, api_endpoint, custom_auth, api_model, 
+                custom_prompt, expected_metadata
+            )
+        
+        cache.set(cache_key, result, OCR_CACHE_TIMEOUT)
+        return result
+    
+    def _require_credentials(self, api_endpoint, api_key, vertex_access_token, vertex_project_id, vertex_location):
+        """
+        Raise if the selected endpoint's required credentials are missing.
+        Every transcription entry point calls this before contacting the API.
+        """
+        if api_endpoint == 'openai' and not api_key:
+            raise ValueError("OpenAI API key is required")
+        if api_endpoint == 'vertex' and not all([vertex_access_token, vertex_project_id, vertex_location]):
+            raise ValueError("Vertex access token, project ID, and location are required")
+    
+    def _ocr_cache_key(self, region_bytes, options):
+        """
+        Build a cache key from a BLAKE2b digest of the region bytes and request options
+        """
+        digest = hashlib.blake2b(region_bytes, digest_size=16)
+        digest.update(json.dumps(options, sort_keys=True, default=str).encode('utf-8'))
+        return f"ocr:{digest.hexdigest()}"
     
     def _extract_annotation_region(self, image_path, annotation):
         """
-        Extract the region defined by an annotation from the image
+        Extract the region defined by an annotation from an image
+        """
+        # The page is decoded for this call only, so no full-size bitmap
+        # outlives the request
+        with PILImage.open(image_path) as image:
+            return self._encode_region(image, annotation)
+    
+    def _encode_region(self, image, annotation):
+        """
+        Crop an annotation region from an opened image and encode it as JPEG bytes
         """
-        image = PILImage.open(image_path)
         coordinates = annotation.coordinates
         
         if annotation.annotation_type == 'bbox':
@@ -312,36 +458,96 @@ class OCRService:
             # Extract polygon region
             points = [(point['x'], point['y']) for point in coordinates['points']]
             
-            # Create a mask for the polygon
-            mask = PILImage.new('L', image.size, 0)
-            ImageDraw.Draw(mask).polygon(points, outline=1, fill=1)
-            
-            # Apply the mask to the image
-            region = PILImage.new('RGBA', image.size, (0, 0, 0, 0))
-            region.paste(image, mask=mask)
-            
-            # Crop to the bounding box of the polygon
-            bbox = mask.getbbox()
-            if bbox:
-                region = region.crop(bbox)
+            # Compute the polygon bounding box first, clamped to the image
+            xs = [x for x, _ in points]
+            ys = [y for _, y in points]
+            x0 = min(max(int(min(xs)), 0), image.width)
+            y0 = min(max(int(min(ys)), 0), image.height)
+            x1 = min(max(int(max(xs)) + 1, 0), image.width)
+            y1 = min(max(int(max(ys)) + 1, 0), image.height)
+            
+            if x1 <= x0 or y1 <= y0:
+                # The polygon lies entirely outside the image
+                region = PILImage.new('RGB', (1, 1))
+            else:
+                # Crop first so the mask and canvas are only ROI-sized
+                roi = image.crop((x0, y0, x1, y1))
+                mask = PILImage.new('L', roi.size, 0)
+                ImageDraw.Draw(mask).polygon(
+                    [(x - x0, y - y0) for x, y in points], outline=255, fill=255
+                )
+                
+                # Apply the mask to the cropped region on a black background
+                region = PILImage.new('RGB', roi.size)
+                region.paste(roi, mask=mask)
         
-        # Save the extracted region to a temporary file
-        temp_path = f"/tmp/annotation_region_{annotation.id}_{datetime.now().timestamp()}.png"
-        region.save(temp_path, 'PNG')
+        # Encode the extracted region as JPEG in memory
+        if region.mode not in ('RGB', 'L'):
+            region = region.convert('RGB')
+        buffer = BytesIO()
+        region.save(buffer, 'JPEG', quality=85)
         
-        return temp_path
+        return buffer.getvalue()
+    
+    def _encode_image_b64(self, image):
+        """
+        Base64-encode an image given as encoded bytes or a file path
+        """
+        return base64.b64encode(self._read_image_bytes(image)).decode('ascii')
     
-    def _transcribe_with_openai(self, image_path, api_key, model=None, custom_prompt=None, 
+    def _read_image_bytes(self, image):
+        """
+        Return encoded image bytes, reading from disk when given a file path
+        """
+        if isinstance(image, bytes):
+            return image
+        with open(image, 'rb') as image_file:
+            return image_file.read()
+    
+    def _transcribe_with_openai(self, image, api_key, model=None, custom_prompt=None, 
                                use_structured_output=False, metadata_schema=None):
         """
         Transcribe image using OpenAI Vision API with custom prompts and structured output
         """
-        if not api_key:
-            raise ValueError("OpenAI API key is required")
+        headers, payload = self._build_openai_payload(
+            image, api_key, model, custom_prompt, use_structured_output, metadata_schema
+        )
+        result = self._post_openai(headers, payload)
+        
+        # Extract text and metadata from response
+        text_content = ""
+        metadata = {}
+        
+        if 'choices' in result and len(result['choices']) > 0:
+            content = result['choices'][0]['message']['content']
+            
+            if use_structured_output and metadata_schema:
+                try:
+                    # Parse JSON response for structured output
+                    import json
+                    parsed_content = json.loads(content)
+                    text_content = parsed_content.get('text', '')
+                    metadata = parsed_content.get('metadata', {})
+                except json.JSONDecodeError:
+                    # Fallback to plain text if JSON parsing fails
+                    text_content = content
+            else:
+                text_content = content
         
+        return {
+            'text': text_content,
+            'metadata': metadata,
+            'confidence': None,  # OpenAI doesn't provide confidence scores
+            'raw_response': result
+        }
+    
+    def _build_openai_payload(self, image, api_key, model=None, custom_prompt=None,
+                              use_structured_output=False, metadata_schema=None):
+        """
+        Build the OpenAI request headers and payload, encoding the image once
+        """
         # Encode image as base64
-        with open(image_path, 'rb') as image_file:
-            base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+        base64_image = self._encode_image_b64(image)
         
         headers = {
             "Content-Type": "application/json",
@@ -383,55 +589,30 @@ class OCRService:
                 }
             }
         
-        response = requests.post(
+        return headers, payload
+    
+    def _post_openai(self, headers, payload):
+        """
+        Send a prepared chat completions request and return the parsed response
+        """
+        response = _SESSION.post(
             f"{self.openai_base_url}/chat/completions",
             headers=headers,
             json=payload,
-            timeout=60
+            timeout=OCR_HTTP_TIMEOUT
         )
         
         if response.status_code != 200:
             raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
         
-        result = response.json()
-        
-        # Extract text and metadata from response
-        text_content = ""
-        metadata = {}
-        
-        if 'choices' in result and len(result['choices']) > 0:
-            content = result['choices'][0]['message']['content']
-            
-            if use_structured_output and metadata_schema:
-                try:
-                    # Parse JSON response for structured output
-                    import json
-                    parsed_content = json.loads(content)
-                    text_content = parsed_content.get('text', '')
-                    metadata = parsed_content.get('metadata', {})
-                except json.JSONDecodeError:
-                    # Fallback to plain text if JSON parsing fails
-                    text_content = content
-            else:
-                text_content = content
-        
-        return {
-            'text': text_content,
-            'metadata': metadata,
-            'confidence': None,  # OpenAI doesn't provide confidence scores
-            'raw_response': result
-        }
+        return response.json()
 
-    def _transcribe_with_vertex(self, image_path, access_token, project_id, location, model, custom_prompt=None, expected_metadata=None):
+    def _transcribe_with_vertex(self, image, access_token, project_id, location, model, custom_prompt=None, expected_metadata=None):
         """
         Transcribe image using Google Vertex AI Vision API
         """
-        if not all([access_token, project_id, location]):
-            raise ValueError("Vertex access token, project ID, and location are required")
-        
         # Encode image as base64
-        with open(image_path, 'rb') as image_file:
-            base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+        base64_image = self._encode_image_b64(image)
         
         # Use custom prompt or default
         prompt_text = custom_prompt or "Please transcribe all text visible in this image. Return only the transcribed text without any additional commentary."
@@ -476,7 +657,7 @@ class OCRService:
             }
         }
         
-        response = requests.post(endpoint, headers=headers, json=payload, timeout=60)
+        response = _SESSION.post(endpoint, headers=headers, json=payload, timeout=OCR_HTTP_TIMEOUT)
         
         if response.status_code != 200:
             logger.error(f"Vertex AI API error: {response.status_code} - {response.text}")
@@ -522,7 +703,7 @@ class OCRService:
             'raw_response': result
         }
     
-    def _transcribe_with_custom_endpoint(self, image_path, endpoint_url, auth_header, model=None, 
+    def _transcribe_with_custom_endpoint(self, image, endpoint_url, auth_header, model=None, 
                                        custom_prompt=None, expected_metadata=None):
         """
         Transcribe image using a custom OCR endpoint with custom prompts and metadata
@@ -532,23 +713,25 @@ class OCRService:
             headers['Authorization'] = auth_header
         
         # Prepare the image file for upload
-        with open(image_path, 'rb') as image_file:
-            files = {'image': image_file}
-            data = {}
-            if model:
-                data['model'] = model
-            if custom_prompt:
-                data['prompt'] = custom_prompt
-            if expected_metadata:
-                data['expected_metadata'] = json.dumps(expected_metadata)
-            
-            response = requests.post(
-                endpoint_url,
-                files=files,
-                data=data,
-                headers=headers,
-                timeout=60
-            )
+        if isinstance(image, bytes):
+            files = {'image': ('region.jpg', image, 'image/jpeg')}
+        else:
+            files = {'image': (os.path.basename(image), self._read_image_bytes(image))}
+        data = {}
+        if model:
+            data['model'] = model
+        if custom_prompt:
+            data['prompt'] = custom_prompt
+        if expected_metadata:
+            data['expected_metadata'] = json.dumps(expected_metadata)
+        
+        response = _SESSION.post(
+            endpoint_url,
+            files=files,
+            data=data,
+            headers=headers,
+            timeout=OCR_HTTP_TIMEOUT
+        )
         
         if response.status_code != 200:
             raise Exception(f"Custom API error: {response.status_code} - {response.text}")
@@ -639,20 +822,60 @@ class ExportService:
         else:
             raise ValueError(f"Unsupported export format: {export_format}")
     
+    def _export_documents(self, project):
+        """Load a project's documents with ordered images and their annotations prefetched"""
+        from django.db.models import Prefetch
+        from .models import Image
+        
+        return project.documents.prefetch_related(Prefetch(
+            'images',
+            queryset=Image.objects.order_by('order').prefetch_related('annotations')
+        ))
+    
+    def _current_transcription_maps(self, **scope):
+        """
+        Load current transcriptions in one query and map them by image id
+        (image-level) and by annotation id
+        """
+        from .models import Transcription
+        
+        by_image = {}
+        by_annotation = {}
+        transcriptions = Transcription.objects.filter(is_current=True, **scope).only(
+            'image', 'annotation', 'text_content', 'confidence_score', 'created_at'
+        )
+        for transcription in transcriptions:
+            if transcription.annotation_id is None:
+                by_image[transcription.image_id] = transcription
+            else:
+                by_annotation[transcription.annotation_id] = transcription
+        return by_image, by_annotation
+    
     def _export_image_json(self, image):
         """Export image as JSON"""
+        data = self._image_json_data(image)
+        
+        filename = f"image_{image.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        filepath = os.path.join(self.export_dir, filename)
+        
+        _write_json(filepath, data)
+        
+        return filepath
+    
+    def _image_json_data(self, image):
+        """Build the JSON export data for an image"""
+        image_transcriptions, annotation_transcriptions = self._current_transcription_maps(image=image)
+        
         # Get current transcription
-        current_transcription = image.transcriptions.filter(
-            is_current=True, annotation__isnull=True
-        ).first()
+        current_transcription = image_transcriptions.get(image.id)
         
         # Get all annotations with their transcriptions
         annotations_data = []
         for annotation in image.annotations.all():
-            annotation_transcription = annotation.transcriptions.filter(is_current=True).first()
+            annotation_transcription = annotation_transcriptions.get(annotation.id)
             
             annotations_data.append({
-                'id': str(annotation.id),
+                'id': annotation.id,
                 'type': annotation.annotation_type,
                 'classification': annotation.classification,
                 'coordinates': annotation.coordinates,
@@ -662,22 +885,22 @@ class ExportService:
                 'transcription': {
                     'text': annotation_transcription.text_content if annotation_transcription else '',
                     'confidence': annotation_transcription.confidence_score if annotation_transcription else None,
-                    'created_at': annotation_transcription.created_at.isoformat() if annotation_transcription else None
+                    'created_at': annotation_transcription.created_at if annotation_transcription else None
                 } if annotation_transcription else None
             })
         
         data = {
             'image': {
-                'id': str(image.id),
+                'id': image.id,
                 'name': image.name,
                 'original_filename': image.original_filename,
                 'width': image.width,
                 'height': image.height,
                 'document': {
-                    'id': str(image.document.id),
+                    'id': image.document.id,
                     'name': image.document.name,
                     'project': {
-                        'id': str(image.document.project.id),
+                        'id': image.document.project.id,
                         'name': image.document.project.name
                     }
                 }
@@ -685,105 +908,90 @@ class ExportService:
             'transcription': {
                 'text': current_transcription.text_content if current_transcription else '',
                 'confidence': current_transcription.confidence_score if current_transcription else None,
-                'created_at': current_transcription.created_at.isoformat() if current_transcription else None
+                'created_at': current_transcription.created_at if current_transcription else None
             } if current_transcription else None,
             'annotations': annotations_data,
             'exported_at': datetime.now().isoformat()
         }
         
-        filename = f"image_{image.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        filepath = os.path.join(self.export_dir, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        
-        return filepath
+        return data
     
     def _export_image_pagexml(self, image):
         """Export image as PageXML format"""
-        # Get current transcription
-        current_transcription = image.transcriptions.filter(
-            is_current=True, annotation__isnull=True
-        ).first()
-        
-        # Get all annotations with their transcriptions
-        annotations = image.annotations.all().order_by('reading_order')
-        
-        context = {
-            'image': image,
-            'transcription': current_transcription,
-            'annotations': annotations,
-            'exported_at': datetime.now().isoformat()
-        }
-        
-        # Render PageXML template
-        pagexml_content = self._render_pagexml_template(context)
+        pagexml_content = self._generate_pagexml_for_image(image, image.original_filename)
         
         filename = f"image_{image.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xml"
         filepath = os.path.join(self.export_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
+        with open(filepath, 'wb') as f:
             f.write(pagexml_content)
         
         return filepath
     
     def _export_image_zip(self, image):
         """Export image with all data as ZIP"""
-        # Create temporary directory for ZIP contents
-        temp_dir = os.path.join(self.export_dir, f"temp_{image.id}_{datetime.now().timestamp()}")
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        try:
-            # Export JSON data
-            json_path = self._export_image_json(image)
-            json_filename = f"{image.name}_data.json"
-            os.rename(json_path, os.path.join(temp_dir, json_filename))
-            
-            # Export PageXML data
-            pagexml_path = self._export_image_pagexml(image)
-            pagexml_filename = f"{image.name}_pagexml.xml"
-            os.rename(pagexml_path, os.path.join(temp_dir, pagexml_filename))
+        zip_filename = f"image_{image.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        zip_filepath = os.path.join(self.export_dir, zip_filename)
+        
+        # Write every entry straight into the archive, without a temporary directory
+        with self._open_export_zip(zip_filepath) as zipf:
+            zipf.writestr(f"{image.name}_data.json", _dumps_json(self._image_json_data(image)))
+            zipf.writestr(
+                f"{image.name}_pagexml.xml",
+                self._generate_pagexml_for_image(image, image.original_filename)
+            )
             
             # Copy image file
             if image.image_file and default_storage.exists(image.image_file.name):
-                image_filename = f"{image.name}_{image.original_filename}"
-                with default_storage.open(image.image_file.name, 'rb') as src:
-                    with open(os.path.join(temp_dir, image_filename), 'wb') as dst:
-                        dst.write(src.read())
-            
-            # Create ZIP file
-            zip_filename = f"image_{image.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-            zip_filepath = os.path.join(self.export_dir, zip_filename)
-            
-            with zipfile.ZipFile(zip_filepath, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        zipf.write(file_path, file)
-            
-            return zip_filepath
-            
-        finally:
-            # Clean up temporary directory
-            import shutil
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
+                self._write_storage_file(
+                    zipf, image.image_file.name, f"{image.name}_{image.original_filename}"
+                )
+        
+        return zip_filepath
+    
+    def _open_export_zip(self, zip_filepath):
+        """Open an export archive that deflates XML/JSON entries at a fast level"""
+        return zipfile.ZipFile(
+            zip_filepath, 'w', zipfile.ZIP_DEFLATED,
+            allowZip64=True, compresslevel=EXPORT_ZIP_COMPRESSLEVEL
+        )
+    
+    def _write_storage_file(self, zipf, name, arcname):
+        """Stream a stored file into a ZIP entry without compressing it again"""
+        info = zipfile.ZipInfo(arcname, date_time=datetime.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        info.external_attr = 0o644 << 16
+        with default_storage.open(name, 'rb') as src:
+            with zipf.open(info, 'w', force_zip64=True) as dst:
+                shutil.copyfileobj(src, dst, length=1024 * 1024)
     
     def _export_document_json(self, document):
         """Export document as JSON"""
+        data = self._document_json_data(document)
+        
+        filename = f"document_{document.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        filepath = os.path.join(self.export_dir, filename)
+        
+        _write_json(filepath, data)
+        
+        return filepath
+    
+    def _document_json_data(self, document):
+        """Build the JSON export data for a document"""
         images_data = []
-        for image in document.images.all().order_by('order'):
+        image_transcriptions, annotation_transcriptions = self._current_transcription_maps(
+            image__document=document
+        )
+        for image in document.images.order_by('order').prefetch_related('annotations'):
             # Export each image's data
-            current_transcription = image.transcriptions.filter(
-                is_current=True, annotation__isnull=True
-            ).first()
+            current_transcription = image_transcriptions.get(image.id)
             
             annotations_data = []
             for annotation in image.annotations.all():
-                annotation_transcription = annotation.transcriptions.filter(is_current=True).first()
+                annotation_transcription = annotation_transcriptions.get(annotation.id)
                 
                 annotations_data.append({
-                    'id': str(annotation.id),
+                    'id': annotation.id,
                     'type': annotation.annotation_type,
                     'coordinates': annotation.coordinates,
                     'label': annotation.label,
@@ -791,12 +999,12 @@ class ExportService:
                     'transcription': {
                         'text': annotation_transcription.text_content if annotation_transcription else '',
                         'confidence': annotation_transcription.confidence_score if annotation_transcription else None,
-                        'created_at': annotation_transcription.created_at.isoformat() if annotation_transcription else None
+                        'created_at': annotation_transcription.created_at if annotation_transcription else None
                     } if annotation_transcription else None
                 })
             
             images_data.append({
-                'id': str(image.id),
+                'id': image.id,
                 'name': image.name,
                 'original_filename': image.original_filename,
                 'width': image.width,
@@ -805,19 +1013,19 @@ class ExportService:
                 'transcription': {
                     'text': current_transcription.text_content if current_transcription else '',
                     'confidence': current_transcription.confidence_score if current_transcription else None,
-                    'created_at': current_transcription.created_at.isoformat() if current_transcription else None
+                    'created_at': current_transcription.created_at if current_transcription else None
                 } if current_transcription else None,
                 'annotations': annotations_data
             })
         
         data = {
             'document': {
-                'id': str(document.id),
+                'id': document.id,
                 'name': document.name,
                 'description': document.description,
                 'reading_order': document.reading_order,
                 'project': {
-                    'id': str(document.project.id),
+                    'id': document.project.id,
                     'name': document.project.name
                 }
             },
@@ -825,74 +1033,54 @@ class ExportService:
             'exported_at': datetime.now().isoformat()
         }
         
-        filename = f"document_{document.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        filepath = os.path.join(self.export_dir, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        
-        return filepath
+        return data
     
     def _export_document_zip(self, document):
         """Export document with all images and data as ZIP"""
-        # Create temporary directory for ZIP contents
-        temp_dir = os.path.join(self.export_dir, f"temp_doc_{document.id}_{datetime.now().timestamp()}")
-        os.makedirs(temp_dir, exist_ok=True)
+        zip_filename = f"document_{document.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        zip_filepath = os.path.join(self.export_dir, zip_filename)
         
-        try:
+        with self._open_export_zip(zip_filepath) as zipf:
             # Export document JSON data
-            json_path = self._export_document_json(document)
-            json_filename = f"{document.name}_data.json"
-            os.rename(json_path, os.path.join(temp_dir, json_filename))
+            zipf.writestr(f"{document.name}_data.json", _dumps_json(self._document_json_data(document)))
             
             # Export each image
-            images_dir = os.path.join(temp_dir, 'images')
-            os.makedirs(images_dir, exist_ok=True)
-            
             for image in document.images.all().order_by('order'):
                 # Copy image file
                 if image.image_file and default_storage.exists(image.image_file.name):
                     image_filename = f"{image.order:03d}_{image.name}_{image.original_filename}"
-                    with default_storage.open(image.image_file.name, 'rb') as src:
-                        with open(os.path.join(images_dir, image_filename), 'wb') as dst:
-                            dst.write(src.read())
-            
-            # Create ZIP file
-            zip_filename = f"document_{document.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-            zip_filepath = os.path.join(self.export_dir, zip_filename)
-            
-            with zipfile.ZipFile(zip_filepath, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        # Get relative path for ZIP
-                        rel_path = os.path.relpath(file_path, temp_dir)
-                        zipf.write(file_path, rel_path)
-            
-            return zip_filepath
-            
-        finally:
-            # Clean up temporary directory
-            import shutil
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
+                    self._write_storage_file(zipf, image.image_file.name, f"images/{image_filename}")
+        
+        return zip_filepath
     
     def _export_project_json(self, project):
         """Export project as JSON"""
+        data = self._project_json_data(project)
+        
+        filename = f"project_{project.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        filepath = os.path.join(self.export_dir, filename)
+        
+        _write_json(filepath, data)
+        
+        return filepath
+    
+    def _project_json_data(self, project):
+        """Build the JSON export data for a project"""
+        documents = self._export_documents(project)
+        image_transcriptions, annotation_transcriptions = self._current_transcription_maps(project=project)
+        
         documents_data = []
-        for document in project.documents.all():
+        for document in documents:
             images_data = []
-            for image in document.images.all().order_by('order'):
-                current_transcription = image.transcriptions.filter(
-                    is_current=True, annotation__isnull=True
-                ).first()
+            for image in document.images.all():
+                current_transcription = image_transcriptions.get(image.id)
                 
                 annotations_data = []
                 for annotation in image.annotations.all():
-                    annotation_transcription = annotation.transcriptions.filter(is_current=True).first()
+                    annotation_transcription = annotation_transcriptions.get(annotation.id)
                     
                     annotations_data.append({
-                        'id': str(annotation.id),
+                        'id': annotation.id,
                         'type': annotation.annotation_type,
                         'coordinates': annotation.coordinates,
                         'label': annotation.label,
@@ -900,12 +1088,12 @@ class ExportService:
                         'transcription': {
                             'text': annotation_transcription.text_content if annotation_transcription else '',
                             'confidence': annotation_transcription.confidence_score if annotation_transcription else None,
-                            'created_at': annotation_transcription.created_at.isoformat() if annotation_transcription else None
+                            'created_at': annotation_transcription.created_at if annotation_transcription else None
                         } if annotation_transcription else None
                     })
                 
                 images_data.append({
-                    'id': str(image.id),
+                    'id': image.id,
                     'name': image.name,
                     'original_filename': image.original_filename,
                     'width': image.width,
@@ -914,13 +1102,13 @@ class ExportService:
                     'transcription': {
                         'text': current_transcription.text_content if current_transcription else '',
                         'confidence': current_transcription.confidence_score if current_transcription else None,
-                        'created_at': current_transcription.created_at.isoformat() if current_transcription else None
+                        'created_at': current_transcription.created_at if current_transcription else None
                     } if current_transcription else None,
                     'annotations': annotations_data
                 })
             
             documents_data.append({
-                'id': str(document.id),
+                'id': document.id,
                 'name': document.name,
                 'description': document.description,
                 'reading_order': document.reading_order,
@@ -929,179 +1117,98 @@ class ExportService:
         
         data = {
             'project': {
-                'id': str(project.id),
+                'id': project.id,
                 'name': project.name,
                 'description': project.description,
                 'owner': project.owner.username,
-                'created_at': project.created_at.isoformat()
+                'created_at': project.created_at
             },
             'documents': documents_data,
             'exported_at': datetime.now().isoformat()
         }
         
-        filename = f"project_{project.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        filepath = os.path.join(self.export_dir, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        
-        return filepath
+        return data
     
     def _export_project_zip(self, project):
         """Export project with all documents, images and data as ZIP"""
-        # Create temporary directory for ZIP contents
-        temp_dir = os.path.join(self.export_dir, f"temp_proj_{project.id}_{datetime.now().timestamp()}")
-        os.makedirs(temp_dir, exist_ok=True)
+        from .models import Image
         
-        try:
+        zip_filename = f"project_{project.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        zip_filepath = os.path.join(self.export_dir, zip_filename)
+        
+        with self._open_export_zip(zip_filepath) as zipf:
             # Export project JSON data
-            json_path = self._export_project_json(project)
-            json_filename = f"{project.name}_data.json"
-            os.rename(json_path, os.path.join(temp_dir, json_filename))
+            zipf.writestr(f"{project.name}_data.json", _dumps_json(self._project_json_data(project)))
             
             # Export each document
-            for document in project.documents.all():
-                doc_dir = os.path.join(temp_dir, f"document_{document.name}")
-                os.makedirs(doc_dir, exist_ok=True)
-                
-                images_dir = os.path.join(doc_dir, 'images')
-                os.makedirs(images_dir, exist_ok=True)
-                
-                for image in document.images.all().order_by('order'):
-                    # Copy image file
-                    if image.image_file and default_storage.exists(image.image_file.name):
-                        image_filename = f"{image.order:03d}_{image.name}_{image.original_filename}"
-                        with default_storage.open(image.image_file.name, 'rb') as src:
-                            with open(os.path.join(images_dir, image_filename), 'wb') as dst:
-                                dst.write(src.read())
-            
-            # Create ZIP file
-            zip_filename = f"project_{project.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-            zip_filepath = os.path.join(self.export_dir, zip_filename)
-            
-            with zipfile.ZipFile(zip_filepath, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        # Get relative path for ZIP
-                        rel_path = os.path.relpath(file_path, temp_dir)
-                        zipf.write(file_path, rel_path)
-            
-            return zip_filepath
-            
-        finally:
-            # Clean up temporary directory
-            import shutil
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
+            images = Image.objects.filter(project=project).select_related('document')
+            for image in images.order_by('document', 'order'):
+                # Copy image file
+                if image.image_file and default_storage.exists(image.image_file.name):
+                    image_filename = f"{image.order:03d}_{image.name}_{image.original_filename}"
+                    self._write_storage_file(
+                        zipf, image.image_file.name,
+                        f"document_{image.document.name}/images/{image_filename}"
+                    )
+        
+        return zip_filepath
     
     def _export_document_pagexml(self, document):
-        """Export document as PageXML format"""
-        # For now, combine all images into a single PageXML document
-        # In a more sophisticated implementation, each image could be a separate page
-        
-        context = {
-            'document': document,
-            'images': document.images.all().order_by('order'),
-            'exported_at': datetime.now().isoformat()
-        }
-        
-        pagexml_content = self._render_pagexml_template(context)
+        """Export document as PageXML format, one Page per image"""
+        pagexml_content = self._generate_pagexml_for_document(document)
         
         filename = f"document_{document.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xml"
         filepath = os.path.join(self.export_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
+        with open(filepath, 'wb') as f:
             f.write(pagexml_content)
         
         return filepath
     
     def _export_project_pagexml(self, project):
         """Export project as PageXML format"""
-        context = {
-            'project': project,
-            'documents': project.documents.all(),
-            'exported_at': datetime.now().isoformat()
-        }
-        
-        pagexml_content = self._render_pagexml_template(context)
+        pagexml_content = self._generate_pagexml_for_project(project)
         
         filename = f"project_{project.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xml"
         filepath = os.path.join(self.export_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
+        with open(filepath, 'wb') as f:
             f.write(pagexml_content)
         
         return filepath
     
-    def _render_pagexml_template(self, context):
-        """Render PageXML template with given context"""
-        # Basic PageXML template - can be enhanced with proper PageXML schema
-        template = '''<?xml version="1.0" encoding="UTF-8"?>
-<PcGts xmlns="http://schema.primaresearch.org/PAGE/gts/pagecontent/2013-07-15">
-  <Metadata>
-    <Creator>VLAMy OCR Export</Creator>
-    <Created>{{ exported_at }}</Created>
-  </Metadata>
-  {% if image %}
-  <Page imageFilename="{{ image.original_filename }}" imageWidth="{{ image.width }}" imageHeight="{{ image.height }}">
-    {% if transcription %}
-    <TextRegion>
-      <TextLine>
-        <TextEquiv>
-          <Unicode>{{ transcription.text_content }}</Unicode>
-        </TextEquiv>
-      </TextLine>
-    </TextRegion>
-    {% endif %}
-    {% for annotation in annotations %}
-    <TextRegion>
-      {% if annotation.annotation_type == 'bbox' %}
-      <Coords points="{{ annotation.coordinates.x }},{{ annotation.coordinates.y }} {{ annotation.coordinates.x|add:annotation.coordinates.width }},{{ annotation.coordinates.y }} {{ annotation.coordinates.x|add:annotation.coordinates.width }},{{ annotation.coordinates.y|add:annotation.coordinates.height }} {{ annotation.coordinates.x }},{{ annotation.coordinates.y|add:annotation.coordinates.height }}"/>
-      {% elif annotation.annotation_type == 'polygon' %}
-      <Coords points="{% for point in annotation.coordinates.points %}{{ point.x }},{{ point.y }}{% if not forloop.last %} {% endif %}{% endfor %}"/>
-      {% endif %}
-      {% if annotation.transcriptions.current %}
-      <TextLine>
-        <TextEquiv>
-          <Unicode>{{ annotation.transcriptions.current.text_content }}</Unicode>
-        </TextEquiv>
-      </TextLine>
-      {% endif %}
-    </TextRegion>
-    {% endfor %}
-  </Page>
-  {% endif %}
-</PcGts>'''
-        
-        from django.template import Template, Context
-        t = Template(template)
-        return t.render(Context(context))
-    
     def export_projects_vlamy(self, projects, export_id):
         """Export multiple projects in VLAMy format"""
         import uuid
         unique_id = str(uuid.uuid4())[:8]
         
-        # Create temporary directory for ZIP contents
-        temp_dir = os.path.join(self.export_dir, f"temp_vlamy_{export_id}_{datetime.now().timestamp()}")
-        os.makedirs(temp_dir, exist_ok=True)
+        # One timestamp for every file in this export
+        now = datetime.now()
+        exported_at = now.isoformat()
         
-        try:
+        zip_filename = f"vlamy_export_{unique_id}_{now.strftime('%Y%m%d_%H%M%S')}.zip"
+        zip_filepath = os.path.join(self.export_dir, zip_filename)
+        
+        # Write every entry under its final name, without a temporary directory
+        used_names = set()
+        with self._open_export_zip(zip_filepath) as zipf:
             # Process each project
             for project in projects:
-                # Create project directory
-                project_dir = os.path.join(temp_dir, self._sanitize_filename(project.name))
-                os.makedirs(project_dir, exist_ok=True)
+                # Give projects with the same sanitized name their own folder
+                project_dir = base_dir = self._sanitize_filename(project.name)
+                counter = 1
+                while project_dir in used_names:
+                    project_dir = f"{base_dir}_{counter}"
+                    counter += 1
+                used_names.add(project_dir)
                 
-                # Create page directory for PageXML files
-                page_dir = os.path.join(project_dir, 'page')
-                os.makedirs(page_dir, exist_ok=True)
+                transcription_maps = self._current_transcription_maps(project=project)
                 
-                # Process all images in all documents of this project
-                for document in project.documents.all():
-                    for image in document.images.all().order_by('order'):
-                        # Copy original image to project root
+                # Collect all images in all documents of this project
+                documents = list(self._export_documents(project))
+                entries = []
+                for document in documents:
+                    for image in document.images.all():
                         if image.image_file and default_storage.exists(image.image_file.name):
                             # Use original filename or create a clean one
                             image_filename = image.original_filename
@@ -1109,121 +1216,101 @@ class ExportService:
                                 image_filename = f"{image.name}.jpg"
                             
                             # Ensure unique filename if there are duplicates
-                            image_path = os.path.join(project_dir, image_filename)
                             counter = 1
                             base_name, ext = os.path.splitext(image_filename)
-                            while os.path.exists(image_path):
+                            while f"{project_dir}/{image_filename}" in used_names:
                                 image_filename = f"{base_name}_{counter}{ext}"
-                                image_path = os.path.join(project_dir, image_filename)
                                 counter += 1
-                            
-                            with default_storage.open(image.image_file.name, 'rb') as src:
-                                with open(image_path, 'wb') as dst:
-                                    dst.write(src.read())
-                            
-                            # Create PageXML file for this image
-                            pagexml_filename = f"{os.path.splitext(image_filename)[0]}.xml"
-                            pagexml_path = os.path.join(page_dir, pagexml_filename)
-                            
-                            # Generate PageXML content for this image
-                            pagexml_content = self._generate_pagexml_for_image(image, image_filename)
-                            
-                            with open(pagexml_path, 'w', encoding='utf-8') as f:
-                                f.write(pagexml_content)
+                            used_names.add(f"{project_dir}/{image_filename}")
+                            entries.append((image, image_filename))
+                
+                for image, image_filename in entries:
+                    # Copy original image to project root
+                    self._write_storage_file(
+                        zipf, image.image_file.name, f"{project_dir}/{image_filename}"
+                    )
+                    
+                    # Add the PageXML file for this image, built from the
+                    # transcriptions already loaded above (no queries)
+                    pagexml_content = self._generate_pagexml_for_image(
+                        image, image_filename, transcription_maps, exported_at
+                    )
+                    pagexml_filename = f"{os.path.splitext(image_filename)[0]}.xml"
+                    zipf.writestr(f"{project_dir}/page/{pagexml_filename}", pagexml_content)
                 
                 # Create project metadata JSON
-                project_metadata = self._create_project_metadata(project)
-                metadata_path = os.path.join(project_dir, 'metadata.json')
-                with open(metadata_path, 'w', encoding='utf-8') as f:
-                    json.dump(project_metadata, f, indent=2, ensure_ascii=False)
-            
-            # Create ZIP file
-            zip_filename = f"vlamy_export_{unique_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-            zip_filepath = os.path.join(self.export_dir, zip_filename)
-            
-            with zipfile.ZipFile(zip_filepath, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        # Get relative path for ZIP
-                        rel_path = os.path.relpath(file_path, temp_dir)
-                        zipf.write(file_path, rel_path)
-            
-            return zip_filepath
-            
-        finally:
-            # Clean up temporary directory
-            import shutil
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
+                project_metadata = self._create_project_metadata(project, documents, exported_at)
+                zipf.writestr(f"{project_dir}/metadata.json", _dumps_json(project_metadata))
+        
+        return zip_filepath
     
     def export_projects_bulk(self, projects, export_format, export_id):
         """Export multiple projects in specified format (json or pagexml)"""
         import uuid
         unique_id = str(uuid.uuid4())[:8]
         
+        # One timestamp for every file in this export
+        now = datetime.now()
+        exported_at = now.isoformat()
+        
         if export_format == 'json':
             # Create a single JSON file with all projects
-            all_projects_data = {
-                'export_info': {
-                    'export_id': str(export_id),
-                    'unique_id': unique_id,
-                    'exported_at': datetime.now().isoformat(),
-                    'project_count': len(projects),
-                    'format': 'json'
-                },
-                'projects': []
+            export_info = {
+                'export_id': str(export_id),
+                'unique_id': unique_id,
+                'exported_at': exported_at,
+                'project_count': len(projects),
+                'format': 'json'
             }
             
-            for project in projects:
-                project_data = self._get_project_export_data(project)
-                all_projects_data['projects'].append(project_data)
-            
-            filename = f"bulk_export_{unique_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            filename = f"bulk_export_{unique_id}_{now.strftime('%Y%m%d_%H%M%S')}.json.gz"
             filepath = os.path.join(self.export_dir, filename)
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(all_projects_data, f, indent=2, ensure_ascii=False)
+            # Compress while streaming so the large JSON never exists uncompressed
+            with gzip.open(filepath, 'wb', compresslevel=3) as f:
+                self._write_bulk_json(f, export_info, projects)
             
             return filepath
             
         elif export_format == 'pagexml':
             # Create a ZIP file with PageXML for each project
-            temp_dir = os.path.join(self.export_dir, f"temp_bulk_xml_{export_id}_{datetime.now().timestamp()}")
-            os.makedirs(temp_dir, exist_ok=True)
+            zip_filename = f"bulk_pagexml_export_{unique_id}_{now.strftime('%Y%m%d_%H%M%S')}.zip"
+            zip_filepath = os.path.join(self.export_dir, zip_filename)
             
-            try:
+            used_names = set()
+            with self._open_export_zip(zip_filepath) as zipf:
                 for project in projects:
-                    pagexml_content = self._generate_pagexml_for_project(project)
-                    filename = f"{self._sanitize_filename(project.name)}.xml"
-                    filepath = os.path.join(temp_dir, filename)
+                    # Ensure unique filename if there are duplicates
+                    base_name = self._sanitize_filename(project.name)
+                    filename = f"{base_name}.xml"
+                    counter = 1
+                    while filename in used_names:
+                        filename = f"{base_name}_{counter}.xml"
+                        counter += 1
+                    used_names.add(filename)
                     
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        f.write(pagexml_content)
-                
-                # Create ZIP file
-                zip_filename = f"bulk_pagexml_export_{unique_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-                zip_filepath = os.path.join(self.export_dir, zip_filename)
-                
-                with zipfile.ZipFile(zip_filepath, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    for root, dirs, files in os.walk(temp_dir):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            zipf.write(file_path, file)
-                
-                return zip_filepath
-                
-            finally:
-                # Clean up temporary directory
-                import shutil
-                if os.path.exists(temp_dir):
-                    shutil.rmtree(temp_dir)
+                    zipf.writestr(filename, self._generate_pagexml_for_project(project, exported_at))
+            
+            return zip_filepath
+    
+    def _write_bulk_json(self, f, export_info, projects):
+        """
+        Write the bulk JSON export one project at a time, so only a single
+        project's data is held in memory
+        """
+        f.write(b'{\n"export_info": ')
+        f.write(_dumps_json(export_info))
+        f.write(b',\n"projects": [\n')
+        for index, project in enumerate(projects):
+            if index:
+                f.write(b',\n')
+            f.write(_dumps_json(self._get_project_export_data(project)))
+        f.write(b'\n]\n}\n')
     
     def _sanitize_filename(self, filename):
         """Sanitize filename for cross-platform compatibility"""
-        import re
         # Remove or replace invalid characters
-        filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+        filename = INVALID_FILENAME_CHARS.sub('_', filename)
         # Remove leading/trailing whitespace and periods
         filename = filename.strip(' .')
         # Limit length
@@ -1231,192 +1318,223 @@ class ExportService:
             filename = filename[:100]
         return filename or 'unnamed'
     
-    def _generate_pagexml_for_image(self, image, image_filename):
-        """Generate PageXML content for a single image"""
-        from .models import PAGEXML_MAPPINGS
+    def _generate_pagexml_for_image(self, image, image_filename, transcription_maps=None, exported_at=None):
+        """
+        Generate PageXML content (UTF-8 bytes) for a single image. Callers
+        exporting many images pass the current transcription maps loaded once
+        for their scope, and the export's timestamp.
+        """
+        if transcription_maps is None:
+            transcription_maps = self._current_transcription_maps(image=image)
+        image_transcriptions, annotation_transcriptions = transcription_maps
         
         # Get current transcription
-        current_transcription = image.transcriptions.filter(
-            is_current=True, annotation__isnull=True
-        ).first()
+        current_transcription = image_transcriptions.get(image.id)
         
-        # Get all annotations with their transcriptions
-        annotations = image.annotations.all().order_by('reading_order')
-        
-        # Build PageXML content
-        pagexml_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<PcGts xmlns="http://schema.primaresearch.org/PAGE/gts/pagecontent/2013-07-15"
-       xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
-       xsi:schemaLocation="http://schema.primaresearch.org/PAGE/gts/pagecontent/2013-07-15
-                           http://schema.primaresearch.org/PAGE/gts/pagecontent/2013-07-15/pagecontent.xsd">
-  <Metadata>
-    <Creator>VLAMy OCR Export</Creator>
-    <Created>{datetime.now().isoformat()}</Created>
-    <LastChange>{datetime.now().isoformat()}</LastChange>
-  </Metadata>
-  <Page imageFilename="{image_filename}" imageWidth="{image.width}" imageHeight="{image.height}">'''
+        # Get all annotations with their transcriptions (ordered by reading order)
+        annotations = list(image.annotations.all())
+        
+        # Build PageXML tree
+        root = self._pagexml_root(created=exported_at)
+        page = etree.SubElement(root, _page_tag('Page'), {
+            'imageFilename': _xml_safe(image_filename),
+            'imageWidth': str(image.width),
+            'imageHeight': str(image.height),
+        })
         
         # Add text regions for annotations
         region_id = 1
         for annotation in annotations:
-            annotation_transcription = annotation.transcriptions.filter(is_current=True).first()
+            annotation_transcription = annotation_transcriptions.get(annotation.id)
             
             # Determine region type based on classification
             region_type = PAGEXML_MAPPINGS.get(annotation.classification, 'TextRegion')
             
-            # Escape XML special characters in metadata
-            annotation_label = self._escape_xml(annotation.label or '')
-            annotation_classification = self._escape_xml(annotation.classification or '')
-            
-            pagexml_content += f'''
-    <{region_type} id="region_{region_id:04d}" custom="annotation_type:{annotation.annotation_type};classification:{annotation_classification};label:{annotation_label};reading_order:{annotation.reading_order}">'''
+            region = etree.SubElement(page, _page_tag(region_type), {
+                'id': f"region_{region_id:04d}",
+                'custom': _xml_safe(
+                    f"annotation_type:{annotation.annotation_type};"
+                    f"classification:{annotation.classification or ''};"
+                    f"label:{annotation.label or ''};"
+                    f"reading_order:{annotation.reading_order}"
+                ),
+            })
             
             # Add metadata as custom attributes if present
             if annotation.metadata:
-                metadata_str = ";".join([f"{k}:{self._escape_xml(str(v))}" for k, v in annotation.metadata.items()])
-                pagexml_content += f'''
-      <UserAttribute name="metadata" value="{metadata_str}"/>'''
+                metadata_str = _xml_safe(";".join([f"{k}:{v}" for k, v in annotation.metadata.items()]))
+                etree.SubElement(region, _page_tag('UserAttribute'), name='metadata', value=metadata_str)
             
             # Add coordinates
-            if annotation.annotation_type == 'bbox':
-                x = annotation.coordinates['x']
-                y = annotation.coordinates['y']
-                width = annotation.coordinates['width']
-                height = annotation.coordinates['height']
-                points = f"{x},{y} {x+width},{y} {x+width},{y+height} {x},{y+height}"
-            elif annotation.annotation_type == 'polygon':
-                points = " ".join([f"{point['x']},{point['y']}" for point in annotation.coordinates['points']])
-            else:
-                points = "0,0 100,0 100,100 0,100"  # Fallback
+            points = self._pagexml_points(annotation.annotation_type, annotation.coordinates)
             
-            pagexml_content += f'''
-      <Coords points="{points}"/>'''
+            etree.SubElement(region, _page_tag('Coords'), points=points)
             
             # Add transcription if it's a text region
-            if region_type in ['TextRegion', 'CustomRegion'] and annotation_transcription:
-                pagexml_content += f'''
-      <TextLine id="line_{region_id:04d}_001">
-        <Coords points="{points}"/>
-        <TextEquiv>
-          <Unicode>{self._escape_xml(annotation_transcription.text_content)}</Unicode>
-        </TextEquiv>
-      </TextLine>'''
+            if region_type in TEXT_LINE_REGION_TYPES and annotation_transcription:
+                self._add_pagexml_text_line(
+                    region, f"line_{region_id:04d}_001", points, annotation_transcription.text_content
+                )
             
-            pagexml_content += f'''
-    </{region_type}>'''
             region_id += 1
         
         # Add full image transcription if available and no annotations
-        if current_transcription and not annotations.exists():
-            pagexml_content += f'''
-    <TextRegion id="region_full">
-      <Coords points="0,0 {image.width},0 {image.width},{image.height} 0,{image.height}"/>
-      <TextLine id="line_full_001">
-        <Coords points="0,0 {image.width},0 {image.width},{image.height} 0,{image.height}"/>
-        <TextEquiv>
-          <Unicode>{self._escape_xml(current_transcription.text_content)}</Unicode>
-        </TextEquiv>
-      </TextLine>
-    </TextRegion>'''
-        
-        pagexml_content += '''
-  </Page>
-</PcGts>'''
-        
-        return pagexml_content
-    
-    def _generate_pagexml_for_project(self, project):
-        """Generate PageXML content for an entire project"""
-        pagexml_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<PcGts xmlns="http://schema.primaresearch.org/PAGE/gts/pagecontent/2013-07-15"
-       xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
-       xsi:schemaLocation="http://schema.primaresearch.org/PAGE/gts/pagecontent/2013-07-15
-                           http://schema.primaresearch.org/PAGE/gts/pagecontent/2013-07-15/pagecontent.xsd">
-  <Metadata>
-    <Creator>VLAMy OCR Export</Creator>
-    <Created>{datetime.now().isoformat()}</Created>
-    <LastChange>{datetime.now().isoformat()}</LastChange>
-    <Comments>Project: {self._escape_xml(project.name)}</Comments>
-  </Metadata>'''
-        
-        page_id = 1
-        for document in project.documents.all():
-            for image in document.images.all().order_by('order'):
-                pagexml_content += f'''
-  <Page imageFilename="{image.original_filename or image.name}" imageWidth="{image.width}" imageHeight="{image.height}" id="page_{page_id:04d}">'''
-                
-                # Add image content (simplified for project-wide export)
-                current_transcription = image.transcriptions.filter(
-                    is_current=True, annotation__isnull=True
-                ).first()
-                
-                if current_transcription:
-                    pagexml_content += f'''
-    <TextRegion id="region_{page_id:04d}_001">
-      <Coords points="0,0 {image.width},0 {image.width},{image.height} 0,{image.height}"/>
-      <TextLine id="line_{page_id:04d}_001">
-        <Coords points="0,0 {image.width},0 {image.width},{image.height} 0,{image.height}"/>
-        <TextEquiv>
-          <Unicode>{self._escape_xml(current_transcription.text_content)}</Unicode>
-        </TextEquiv>
-      </TextLine>
-    </TextRegion>'''
-                
-                pagexml_content += '''
-  </Page>'''
-                page_id += 1
-        
-        pagexml_content += '''
-</PcGts>'''
-        
-        return pagexml_content
-    
-    def _escape_xml(self, text):
-        """Escape XML special characters"""
-        if not text:
-            return ""
-        return (text.replace("&", "&amp;")
-                   .replace("<", "&lt;")
-                   .replace(">", "&gt;")
-                   .replace('"', "&quot;")
-                   .replace("'", "&apos;"))
-    
-    def _create_project_metadata(self, project):
-        """Create metadata for a project in the export"""
+        if current_transcription and not annotations:
+            full_points = f"0,0 {image.width},0 {image.width},{image.height} 0,{image.height}"
+            region = etree.SubElement(page, _page_tag('TextRegion'), id='region_full')
+            etree.SubElement(region, _page_tag('Coords'), points=full_points)
+            self._add_pagexml_text_line(
+                region, 'line_full_001', full_points, current_transcription.text_content
+            )
+        
+        return self._serialize_pagexml(root)
+    
+    def _generate_pagexml_for_project(self, project, exported_at=None):
+        """Generate PageXML content (UTF-8 bytes) for an entire project"""
+        from django.db.models import Prefetch
+        from .models import Image
+        
+        documents = project.documents.prefetch_related(
+            Prefetch('images', queryset=Image.objects.order_by('order'))
+        )
+        images = (image for document in documents for image in document.images.all())
+        image_transcriptions, _ = self._current_transcription_maps(project=project, annotation__isnull=True)
+        
+        return self._generate_pagexml_pages(
+            images, image_transcriptions, f"Project: {project.name}", exported_at
+        )
+    
+    def _generate_pagexml_for_document(self, document, exported_at=None):
+        """Generate PageXML content (UTF-8 bytes) for a document"""
+        image_transcriptions, _ = self._current_transcription_maps(
+            image__document=document, annotation__isnull=True
+        )
+        
+        return self._generate_pagexml_pages(
+            document.images.order_by('order'), image_transcriptions,
+            f"Document: {document.name}", exported_at
+        )
+    
+    def _generate_pagexml_pages(self, images, image_transcriptions, comments, exported_at=None):
+        """
+        Build a multi-page PageXML document with one Page per image and its
+        full-image transcription
+        """
+        root = self._pagexml_root(comments=comments, created=exported_at)
+        
+        for page_id, image in enumerate(images, start=1):
+            page = etree.SubElement(root, _page_tag('Page'), {
+                'imageFilename': _xml_safe(image.original_filename or image.name),
+                'imageWidth': str(image.width),
+                'imageHeight': str(image.height),
+                'id': f"page_{page_id:04d}",
+            })
+            
+            # Add image content (simplified for multi-page exports)
+            current_transcription = image_transcriptions.get(image.id)
+            
+            if current_transcription:
+                full_points = f"0,0 {image.width},0 {image.width},{image.height} 0,{image.height}"
+                region = etree.SubElement(page, _page_tag('TextRegion'), id=f"region_{page_id:04d}_001")
+                etree.SubElement(region, _page_tag('Coords'), points=full_points)
+                self._add_pagexml_text_line(
+                    region, f"line_{page_id:04d}_001", full_points, current_transcription.text_content
+                )
+        
+        return self._serialize_pagexml(root)
+    
+    def _pagexml_points(self, annotation_type, coordinates):
+        """Format annotation coordinates as a PageXML points string"""
+        if annotation_type == 'bbox':
+            x = coordinates['x']
+            y = coordinates['y']
+            x2 = x + coordinates['width']
+            y2 = y + coordinates['height']
+            return f"{x},{y} {x2},{y} {x2},{y2} {x},{y2}"
+        elif annotation_type == 'polygon':
+            return " ".join([f"{point['x']},{point['y']}" for point in coordinates['points']])
+        return "0,0 100,0 100,100 0,100"  # Fallback
+    
+    def _pagexml_root(self, comments=None, created=None):
+        """Create the PcGts root element with its Metadata block"""
+        root = etree.Element(_page_tag('PcGts'), nsmap={None: PAGE_NS, 'xsi': XSI_NS})
+        root.set(f"{{{XSI_NS}}}schemaLocation", PAGE_SCHEMA_LOCATION)
+        
+        created = created or datetime.now().isoformat()
+        metadata = etree.SubElement(root, _page_tag('Metadata'))
+        etree.SubElement(metadata, _page_tag('Creator')).text = 'VLAMy OCR Export'
+        etree.SubElement(metadata, _page_tag('Created')).text = created
+        etree.SubElement(metadata, _page_tag('LastChange')).text = created
+        if comments:
+            etree.SubElement(metadata, _page_tag('Comments')).text = _xml_safe(comments)
+        
+        return root
+    
+    def _add_pagexml_text_line(self, region, line_id, points, text):
+        """Append a TextLine with its coordinates and text to a region element"""
+        line = etree.SubElement(region, _page_tag('TextLine'), id=line_id)
+        etree.SubElement(line, _page_tag('Coords'), points=points)
+        text_equiv = etree.SubElement(line, _page_tag('TextEquiv'))
+        etree.SubElement(text_equiv, _page_tag('Unicode')).text = _xml_safe(text or '')
+    
+    def _serialize_pagexml(self, root):
+        """Serialize a PageXML tree to UTF-8 bytes with an XML declaration"""
+        return etree.tostring(root, pretty_print=True, xml_declaration=True, encoding='UTF-8')
+    
+    def _create_project_metadata(self, project, documents=None, exported_at=None):
+        """
+        Create metadata for a project in the export. Callers that already
+        loaded the documents with their images pass them to skip the counts.
+        """
+        from django.db.models import Count
+        
+        if documents is not None:
+            # Count from the documents and images already in memory
+            document_count = len(documents)
+            total_images = sum(len(document.images.all()) for document in documents)
+            first_document = documents[0] if documents else None
+        else:
+            counts = project.documents.aggregate(
+                document_count=Count('id', distinct=True),
+                total_images=Count('images')
+            )
+            document_count = counts['document_count']
+            total_images = counts['total_images']
+            first_document = project.documents.only('name').first()
+        
         # Get the primary document name (first document or most representative)
-        documents = project.documents.all()
-        primary_document_name = documents.first().name if documents.exists() else project.name
+        primary_document_name = first_document.name if first_document else project.name
         
         return {
-            'project_id': str(project.id),
+            'project_id': project.id,
             'name': project.name,
             'description': project.description,
             'owner': project.owner.username,
-            'created_at': project.created_at.isoformat(),
-            'updated_at': project.updated_at.isoformat(),
-            'document_count': project.documents.count(),
-            'total_images': sum([doc.images.count() for doc in project.documents.all()]),
+            'created_at': project.created_at,
+            'updated_at': project.updated_at,
+            'document_count': document_count,
+            'total_images': total_images,
             'original_document_name': primary_document_name,
             'export_format': 'vlamy',
-            'exported_at': datetime.now().isoformat()
+            'exported_at': exported_at or datetime.now().isoformat()
         }
     
     def _get_project_export_data(self, project):
         """Get complete project data for JSON export"""
+        image_transcriptions, annotation_transcriptions = self._current_transcription_maps(project=project)
+        
         documents_data = []
-        for document in project.documents.all():
+        for document in self._export_documents(project):
             images_data = []
-            for image in document.images.all().order_by('order'):
-                current_transcription = image.transcriptions.filter(
-                    is_current=True, annotation__isnull=True
-                ).first()
+            for image in document.images.all():
+                current_transcription = image_transcriptions.get(image.id)
                 
                 annotations_data = []
                 for annotation in image.annotations.all():
-                    annotation_transcription = annotation.transcriptions.filter(is_current=True).first()
+                    annotation_transcription = annotation_transcriptions.get(annotation.id)
                     
                     annotations_data.append({
-                        'id': str(annotation.id),
+                        'id': annotation.id,
                         'type': annotation.annotation_type,
                         'classification': annotation.classification,
                         'coordinates': annotation.coordinates,
@@ -1426,12 +1544,12 @@ class ExportService:
                         'transcription': {
                             'text': annotation_transcription.text_content if annotation_transcription else '',
                             'confidence': annotation_transcription.confidence_score if annotation_transcription else None,
-                            'created_at': annotation_transcription.created_at.isoformat() if annotation_transcription else None
+                            'created_at': annotation_transcription.created_at if annotation_transcription else None
                         } if annotation_transcription else None
                     })
                 
                 images_data.append({
-                    'id': str(image.id),
+                    'id': image.id,
                     'name': image.name,
                     'original_filename': image.original_filename,
                     'width': image.width,
@@ -1440,13 +1558,13 @@ class ExportService:
                     'transcription': {
                         'text': current_transcription.text_content if current_transcription else '',
                         'confidence': current_transcription.confidence_score if current_transcription else None,
-                        'created_at': current_transcription.created_at.isoformat() if current_transcription else None
+                        'created_at': current_transcription.created_at if current_transcription else None
                     } if current_transcription else None,
                     'annotations': annotations_data
                 })
             
             documents_data.append({
-                'id': str(document.id),
+                'id': document.id,
                 'name': document.name,
                 'description': document.description,
                 'reading_order': document.reading_order,
@@ -1454,12 +1572,12 @@ class ExportService:
             })
         
         return {
-            'id': str(project.id),
+            'id': project.id,
             'name': project.name,
             'description': project.description,
             'owner': project.owner.username,
-            'created_at': project.created_at.isoformat(),
-            'updated_at': project.updated_at.isoformat(),
+            'created_at': project.created_at,
+            'updated_at': project.updated_at,
             'documents': documents_data
         } 
 
@@ -1510,15 +1628,15 @@ class ImportService:
         return self._import_project_from_directory(directory_path, user)
     
     def import_json_export(self, json_file, user):
-        """Import JSON export format"""
+        """Import JSON export format, plain or gzip-compressed"""
         import json
         
-        # Load JSON data
+        # Load JSON data, decompressing gzipped files such as bulk exports
         if hasattr(json_file, 'read'):
-            data = json.load(json_file)
+            data = json.load(self._gunzip_if_compressed(json_file))
         else:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(json_file, 'rb') as f:
+                data = json.load(self._gunzip_if_compressed(f))
         
         imported_projects = []
         
@@ -1535,6 +1653,14 @@ class ImportService:
         
         return imported_projects
     
+    def _gunzip_if_compressed(self, f):
+        """Wrap a binary file in a gzip reader when it starts with the gzip magic bytes"""
+        magic = f.read(2)
+        f.seek(0)
+        if magic == b'\x1f\x8b':
+            return gzip.GzipFile(fileobj=f)
+        return f
+    
     def _import_project_from_directory(self, project_path, user):
         """Import a single project from VLAMy directory structure"""
         from .models import Project, Document, Image, Annotation, Transcription
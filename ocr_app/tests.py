@@ -1,3 +1,509 @@
-from django.test import TestCase
+import tempfile
+import zipfile
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from lxml import etree
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .admin import AccountRequestAdmin
+from .models import (
+    AccountRequest, Project, ProjectPermission, Document,
+    Image, Annotation, Transcription
+)
+from .permissions import IsOwnerOrSharedUser
+from .services import PAGE_NS, ExportService, OCRService
+
+
+class ProxyImage(Image):
+    class Meta:
+        proxy = True
+        app_label = 'ocr_app'
+
+
+def create_approved_user(username):
+    """Create a user whose profile (cached on the instance) is approved"""
+    user = User.objects.create_user(username, password='pw')
+    user.profile.is_approved = True
+    user.profile.save()
+    return user
+
+
+def create_project_tree(owner):
+    """Create a project with one document, image, annotation and transcription"""
+    project = Project.objects.create(name='Letters', owner=owner)
+    document = Document.objects.create(name='Box 1', project=project)
+    image = Image.objects.create(
+        name='Page 1',
+        document=document,
+        image_file='images/page1.png',
+        original_filename='page1.png',
+        file_size=1024,
+        width=100,
+        height=200,
+    )
+    annotation = Annotation.objects.create(
+        image=image,
+        annotation_type='bbox',
+        coordinates={'x': 10, 'y': 20, 'width': 30, 'height': 40},
+        created_by=owner,
+    )
+    transcription = Transcription.objects.create(
+        image=image,
+        annotation=annotation,
+        transcription_type='annotation',
+        api_endpoint='openai',
+        status='completed',
+        text_content='Dear friend',
+        created_by=owner,
+    )
+    return project, image, annotation, transcription
+
+
+class ProjectAccessTests(APITestCase):
+    """Owner, shared and unshared access to project data"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_approved_user('owner')
+        cls.shared = create_approved_user('shared')
+        cls.outsider = create_approved_user('outsider')
+
+        cls.project, cls.image, cls.annotation, cls.transcription = create_project_tree(cls.owner)
+        ProjectPermission.objects.create(
+            project=cls.project, user=cls.shared, permission='view', granted_by=cls.owner
+        )
+
+    def assert_access(self, url, expected):
+        for user, expected_status in expected.items():
+            self.client.force_authenticate(user)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, expected_status, f"{user.username}: {url}")
+
+    def test_project_detail(self):
+        self.assert_access(reverse('ocr_app:project-detail', args=[self.project.id]), {
+            self.owner: status.HTTP_200_OK,
+            self.shared: status.HTTP_200_OK,
+            self.outsider: status.HTTP_404_NOT_FOUND,
+        })
+
+    def test_project_list_only_includes_viewable_projects(self):
+        url = reverse('ocr_app:project-list')
+        for user, expected_ids in [
+            (self.owner, [str(self.project.id)]),
+            (self.shared, [str(self.project.id)]),
+            (self.outsider, []),
+        ]:
+            self.client.force_authenticate(user)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual([str(p['id']) for p in response.data['results']], expected_ids)
+
+    def test_image_detail(self):
+        self.assert_access(reverse('ocr_app:image-detail', args=[self.image.id]), {
+            self.owner: status.HTTP_200_OK,
+            self.shared: status.HTTP_200_OK,
+            self.outsider: status.HTTP_404_NOT_FOUND,
+        })
+
+    def test_image_annotations(self):
+        self.assert_access(reverse('ocr_app:image_annotations', args=[self.image.id]), {
+            self.owner: status.HTTP_200_OK,
+            self.shared: status.HTTP_200_OK,
+            self.outsider: status.HTTP_403_FORBIDDEN,
+        })
+
+    def test_transcription_detail(self):
+        self.assert_access(reverse('ocr_app:transcription-detail', args=[self.transcription.id]), {
+            self.owner: status.HTTP_200_OK,
+            self.shared: status.HTTP_200_OK,
+            self.outsider: status.HTTP_404_NOT_FOUND,
+        })
+
+    def test_object_permission_resolves_proxy_models(self):
+        proxy_image = ProxyImage.objects.get(pk=self.image.pk)
+        permission = IsOwnerOrSharedUser()
+        for user, expected in [(self.owner, True), (self.shared, True), (self.outsider, False)]:
+            request = SimpleNamespace(user=user)
+            self.assertEqual(
+                permission.has_object_permission(request, None, proxy_image), expected, user.username
+            )
+
+    def test_unapproved_user_is_rejected(self):
+        self.shared.profile.is_approved = False
+        self.shared.profile.save()
+        self.client.force_authenticate(self.shared)
+        response = self.client.get(reverse('ocr_app:project-detail', args=[self.project.id]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_reorder_annotations(self):
+        second = Annotation.objects.create(
+            image=self.image,
+            annotation_type='bbox',
+            coordinates={'x': 0, 'y': 0, 'width': 5, 'height': 5},
+            reading_order=1,
+            created_by=self.owner,
+        )
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(
+            reverse('ocr_app:reorder_annotations', args=[self.image.id]),
+            {'annotations': [
+                {'id': str(self.annotation.id), 'reading_order': 1},
+                {'id': str(second.id), 'reading_order': 0},
+            ]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.annotation.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((self.annotation.reading_order, second.reading_order), (1, 0))
+
+
+class CurrentTranscriptionTests(TestCase):
+    """Only one transcription is current per annotation, and per image"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='pw')
+        cls.project, cls.image, cls.annotation, cls.transcription = create_project_tree(cls.owner)
+
+    def create_transcription(self, annotation=None, **fields):
+        return Transcription.objects.create(
+            image=self.image,
+            annotation=annotation,
+            transcription_type='annotation' if annotation else 'full_image',
+            api_endpoint='openai',
+            created_by=self.owner,
+            **fields
+        )
+
+    def test_denormalized_project(self):
+        self.assertEqual(self.image.project_id, self.project.id)
+        self.assertEqual(self.annotation.project_id, self.project.id)
+        self.assertEqual(self.transcription.project_id, self.project.id)
+
+    def test_document_move_updates_denormalized_project(self):
+        other = Project.objects.create(name='Diaries', owner=self.owner)
+        document = Document.objects.get(pk=self.image.document_id)
+
+        document.project = other
+        document.save()
+
+        for queryset in (
+            Image.objects.filter(document=document),
+            Annotation.objects.filter(image__document=document),
+            Transcription.objects.filter(image__document=document),
+        ):
+            self.assertEqual(set(queryset.values_list('project_id', flat=True)), {other.id})
+
+    def test_saves_without_a_move_skip_the_cascade(self):
+        document = Document.objects.get(pk=self.image.document_id)
+        document.name = 'Box 2'
+        with self.assertNumQueries(1):
+            document.save()
+
+        image = Image.objects.get(pk=self.image.pk)
+        image.name = 'Page 2'
+        with self.assertNumQueries(1):
+            image.save()
+
+    def test_new_transcription_retires_previous_current(self):
+        newer = self.create_transcription(self.annotation, version=2)
+
+        self.transcription.refresh_from_db()
+        self.assertFalse(self.transcription.is_current)
+        self.assertEqual(
+            list(Transcription.objects.filter(annotation=self.annotation, is_current=True)),
+            [newer]
+        )
+
+    def test_image_and_annotation_currents_are_independent(self):
+        full_image = self.create_transcription()
+
+        self.transcription.refresh_from_db()
+        self.assertTrue(self.transcription.is_current)
+        self.assertTrue(full_image.is_current)
+
+        newer = self.create_transcription()
+        full_image.refresh_from_db()
+        self.assertFalse(full_image.is_current)
+        self.assertTrue(newer.is_current)
+
+    def test_database_rejects_second_current_per_annotation(self):
+        self.create_transcription(self.annotation, version=2)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Transcription.objects.filter(pk=self.transcription.pk).update(is_current=True)
+
+    def test_database_rejects_second_current_per_image(self):
+        first = self.create_transcription()
+        self.create_transcription()
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Transcription.objects.filter(pk=first.pk).update(is_current=True)
+
+
+class AccountRequestAdminTests(TestCase):
+    """Bulk approve/deny admin actions for account requests"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def create_request(self, username):
+        return AccountRequest.objects.create(
+            username=username,
+            email=f"{username}@example.com",
+            password_hash=make_password('pw'),
+        )
+
+    def run_action(self, action, account_requests):
+        return self.client.post(reverse('admin:ocr_app_accountrequest_changelist'), {
+            'action': action,
+            '_selected_action': [str(r.pk) for r in account_requests],
+        })
+
+    def test_approve_creates_approved_users(self):
+        requests = [self.create_request('alice'), self.create_request('bob')]
+
+        response = self.run_action('approve_requests', requests)
+
+        self.assertEqual(response.status_code, 302)
+        for account_request in requests:
+            account_request.refresh_from_db()
+            self.assertEqual(account_request.status, 'approved')
+            self.assertEqual(account_request.reviewed_by, self.admin_user)
+            user = User.objects.get(username=account_request.username)
+            self.assertTrue(user.check_password('pw'))
+            self.assertTrue(user.profile.is_approved)
+            self.assertEqual(user.profile.approved_by, self.admin_user)
+
+    def test_approve_skips_existing_usernames(self):
+        User.objects.create_user('alice', password='other')
+        alice = self.create_request('alice')
+        bob = self.create_request('bob')
+
+        self.run_action('approve_requests', [alice, bob])
+
+        alice.refresh_from_db()
+        bob.refresh_from_db()
+        self.assertEqual(alice.status, 'pending')
+        self.assertEqual(bob.status, 'approved')
+        self.assertEqual(User.objects.filter(username='alice').count(), 1)
+
+    def test_approve_skips_usernames_taken_after_normalization(self):
+        User.objects.create_user('alice', password='other')
+        # Fullwidth letters normalize (NFKC) to the existing 'alice'
+        alice = self.create_request('\uff41\uff4c\uff49\uff43\uff45')
+        bob = self.create_request('bob')
+        create_approved_users = AccountRequestAdmin._create_approved_users
+
+        with mock.patch.object(
+            AccountRequestAdmin, '_create_approved_users',
+            autospec=True, side_effect=create_approved_users
+        ) as create:
+            self.run_action('approve_requests', [alice, bob])
+
+        alice.refresh_from_db()
+        bob.refresh_from_db()
+        self.assertEqual(alice.status, 'pending')
+        self.assertEqual(bob.status, 'approved')
+        # One bulk insert for the batch, without the per-row fallback
+        self.assertEqual(create.call_count, 1)
+
+    def test_failed_row_does_not_fail_its_batch(self):
+        alice = self.create_request('alice')
+        bob = self.create_request('bob')
+        create_approved_users = AccountRequestAdmin._create_approved_users
+
+        def fail_for_bob(admin, request, account_requests, now):
+            if any(r.username == 'bob' for r in account_requests):
+                raise IntegrityError('UNIQUE constraint failed: auth_user.username')
+            return create_approved_users(admin, request, account_requests, now)
+
+        with mock.patch.object(AccountRequestAdmin, '_create_approved_users', fail_for_bob):
+            self.run_action('approve_requests', [alice, bob])
+
+        alice.refresh_from_db()
+        bob.refresh_from_db()
+        self.assertEqual(alice.status, 'approved')
+        self.assertEqual(bob.status, 'pending')
+        self.assertTrue(User.objects.filter(username='alice').exists())
+        self.assertFalse(User.objects.filter(username='bob').exists())
+
+    def test_deny_marks_pending_requests(self):
+        pending = self.create_request('alice')
+        noted = self.create_request('bob')
+        AccountRequest.objects.filter(pk=noted.pk).update(admin_notes='Duplicate')
+
+        self.run_action('deny_requests', [pending, noted])
+
+        pending.refresh_from_db()
+        noted.refresh_from_db()
+        self.assertEqual(pending.status, 'denied')
+        self.assertEqual(pending.admin_notes, 'Denied by admin via admin action')
+        self.assertEqual(noted.status, 'denied')
+        self.assertEqual(noted.admin_notes, 'Duplicate')
+        self.assertFalse(User.objects.filter(username='alice').exists())
+
+
+class PageXMLExportTests(TestCase):
+    """PageXML content of image, document and project exports"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        media_root = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='pw')
+        cls.project, cls.image, cls.annotation, cls.transcription = create_project_tree(cls.owner)
+
+    def setUp(self):
+        self.service = ExportService()
+        if not default_storage.exists(self.image.image_file.name):
+            default_storage.save(self.image.image_file.name, ContentFile(b'image bytes'))
+
+    def parse(self, content):
+        return etree.fromstring(content)
+
+    def unicode_texts(self, root):
+        return [el.text for el in root.iter(f"{{{PAGE_NS}}}Unicode")]
+
+    def create_full_image_transcription(self):
+        return Transcription.objects.create(
+            image=self.image,
+            transcription_type='full_image',
+            api_endpoint='openai',
+            status='completed',
+            text_content='Whole page',
+            created_by=self.owner,
+        )
+
+    def zip_names(self, zip_filepath):
+        with zipfile.ZipFile(zip_filepath) as zipf:
+            return set(zipf.namelist())
+
+    def test_image_regions_and_text(self):
+        root = self.parse(self.service._generate_pagexml_for_image(self.image, 'page1.png'))
+
+        page = root.find(f"{{{PAGE_NS}}}Page")
+        self.assertEqual(
+            (page.get('imageFilename'), page.get('imageWidth'), page.get('imageHeight')),
+            ('page1.png', '100', '200')
+        )
+        regions = page.findall(f"{{{PAGE_NS}}}TextRegion")
+        self.assertEqual([r.get('id') for r in regions], ['region_0001'])
+        self.assertEqual(
+            regions[0].find(f"{{{PAGE_NS}}}Coords").get('points'), '10,20 40,20 40,60 10,60'
+        )
+        self.assertEqual(self.unicode_texts(root), ['Dear friend'])
+
+    def test_document_and_project_pages(self):
+        self.create_full_image_transcription()
+
+        for content, comments in [
+            (self.service._generate_pagexml_for_document(self.image.document), 'Document: Box 1'),
+            (self.service._generate_pagexml_for_project(self.project), 'Project: Letters'),
+        ]:
+            root = self.parse(content)
+            self.assertEqual(root.findtext(f"{{{PAGE_NS}}}Metadata/{{{PAGE_NS}}}Comments"), comments)
+            pages = root.findall(f"{{{PAGE_NS}}}Page")
+            self.assertEqual([p.get('id') for p in pages], ['page_0001'])
+            self.assertEqual(self.unicode_texts(root), ['Whole page'])
+
+    def test_image_zip_entries(self):
+        zip_filepath = self.service._export_image_zip(self.image)
+
+        self.assertEqual(self.zip_names(zip_filepath), {
+            'Page 1_data.json', 'Page 1_pagexml.xml', 'Page 1_page1.png'
+        })
+        with zipfile.ZipFile(zip_filepath) as zipf:
+            self.assertEqual(zipf.read('Page 1_page1.png'), b'image bytes')
+            root = self.parse(zipf.read('Page 1_pagexml.xml'))
+        self.assertEqual(self.unicode_texts(root), ['Dear friend'])
+
+    def test_vlamy_export_zip(self):
+        zip_filepath = self.service.export_projects_vlamy([self.project], export_id=None)
+
+        self.assertEqual(self.zip_names(zip_filepath), {
+            'Letters/page1.png', 'Letters/page/page1.xml', 'Letters/metadata.json'
+        })
+        with zipfile.ZipFile(zip_filepath) as zipf:
+            root = self.parse(zipf.read('Letters/page/page1.xml'))
+        self.assertEqual(self.unicode_texts(root), ['Dear friend'])
+
+    def test_invalid_xml_characters_are_stripped(self):
+        Transcription.objects.filter(pk=self.transcription.pk).update(text_content='Dear\x00 fri\x0cend\n')
+        Annotation.objects.filter(pk=self.annotation.pk).update(label='Note\x1b', metadata={'date\x07': '1850'})
+
+        root = self.parse(self.service._generate_pagexml_for_image(self.image, 'page\x01.png'))
+
+        self.assertEqual(self.unicode_texts(root), ['Dear friend\n'])
+        page = root.find(f"{{{PAGE_NS}}}Page")
+        self.assertEqual(page.get('imageFilename'), 'page.png')
+        region = page.find(f"{{{PAGE_NS}}}TextRegion")
+        self.assertIn('label:Note;', region.get('custom'))
+        self.assertEqual(region.find(f"{{{PAGE_NS}}}UserAttribute").get('value'), 'date:1850')
+
+
+class OCRCacheTests(SimpleTestCase):
+    """Reuse of transcription results for identical regions"""
+
+    def setUp(self):
+        cache.clear()
+        self.service = OCRService()
+        patcher = mock.patch.object(
+            OCRService, '_transcribe_with_openai', return_value={'text': 'Dear friend'}
+        )
+        self.transcribe = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def transcribe_region(self, region_bytes=b'region', **kwargs):
+        return self.service._transcribe_region(
+            region_bytes, 'openai', api_key=kwargs.pop('api_key', 'key-1'), **kwargs
+        )
+
+    def test_cache_key(self):
+        key = self.service._ocr_cache_key(b'region', ['openai', 'key-1'])
+
+        self.assertEqual(key, self.service._ocr_cache_key(b'region', ['openai', 'key-1']))
+        self.assertNotEqual(key, self.service._ocr_cache_key(b'other', ['openai', 'key-1']))
+        self.assertNotEqual(key, self.service._ocr_cache_key(b'region', ['openai', 'key-2']))
+
+    def test_identical_regions_reuse_the_result(self):
+        self.assertEqual(self.transcribe_region(), {'text': 'Dear friend'})
+        self.assertEqual(self.transcribe_region(), {'text': 'Dear friend'})
+        self.assertEqual(self.transcribe.call_count, 1)
+
+        self.transcribe_region(b'other')
+        self.transcribe_region(api_key='key-2')
+        self.assertEqual(self.transcribe.call_count, 3)
+
+    def test_refresh_bypasses_the_cache(self):
+        self.transcribe_region()
+        self.transcribe_region(refresh=True)
+
+        self.assertEqual(self.transcribe.call_count, 2)
+
+    def test_missing_credentials_raise_before_the_lookup(self):
+        with mock.patch('ocr_app.services.cache') as ocr_cache, \
+                self.assertRaisesMessage(ValueError, 'OpenAI API key is required'):
+            self.transcribe_region(api_key=None)
+
+        ocr_cache.get.assert_not_called()
+        self.transcribe.assert_not_called()
@@ -18,11 +18,12 @@ from django.utils.decorators import method_decorator
 from django.views import View
 from django.conf import settings
 from django.utils import timezone
-from django.db.models import Q, Count
+from django.db.models import Q, Count, Prefetch
 from django.db import transaction, models
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.core.paginator import Paginator
+from django.core.exceptions import FieldDoesNotExist
 
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
@@ -42,13 +43,56 @@ from .models import (
 from .serializers import (
     AccountRequestSerializer, UserSerializer, UserProfileSerializer, UserRegistrationSerializer,
     ProjectListSerializer, ProjectDetailSerializer, ProjectPermissionSerializer,
+    PROJECT_LIST_VALUES, project_list_serialize,
     DocumentListSerializer, DocumentDetailSerializer,
     ImageListSerializer, ImageDetailSerializer, 
     AnnotationSerializer, TranscriptionSerializer, ExportJobSerializer,
     APICredentialsSerializer, TranscriptionRequestSerializer
 )
 from .services import OCRService, ExportService, RoboflowDetectionService, ImportService
-from .permissions import IsOwnerOrSharedUser, IsApprovedUser
+from .permissions import IsOwnerOrSharedUser, IsApprovedUser, user_can_view_project
+
+
+class ProjectAccessMixin:
+    """
+    Compute the project ids the user can view and edit once per request.
+    
+    The permission classes check objects against these sets instead of
+    querying sharing rows per object.
+    """
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        
+        user = request.user
+        owned_ids = set(Project.objects.filter(owner=user).values_list('id', flat=True))
+        viewable_ids = set(owned_ids)
+        editable_ids = set(owned_ids)
+        for project_id, permission in ProjectPermission.objects.filter(
+            user=user
+        ).values_list('project_id', 'permission'):
+            viewable_ids.add(project_id)
+            if permission in ('edit', 'admin'):
+                editable_ids.add(project_id)
+        
+        request._viewable_project_ids = frozenset(viewable_ids)
+        request._editable_project_ids = frozenset(editable_ids)
+
+
+class SerializerColumnsMixin:
+    """Restrict list querysets to the model columns a serializer renders"""
+    
+    def get_optimized_queryset(self, queryset, serializer_class, *extra_fields):
+        opts = queryset.model._meta
+        columns = set()
+        for name in serializer_class.Meta.fields:
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                continue  # SerializerMethodField and other computed fields
+            if field.concrete and not field.many_to_many:
+                columns.add(field.name)
+        return queryset.only(*columns, *extra_fields)
 
 
 class AccountRequestView(APIView):
@@ -138,24 +182,22 @@ class AccountRequestAdminView(APIView):
             # Create the user account
             try:
                 with transaction.atomic():
-                    user = User.objects.create_user(
-                        username=account_request.username,
-                        email=account_request.email,
+                    # Insert with the pre-hashed password in a single statement
+                    user = User(
+                        username=User.normalize_username(account_request.username),
+                        email=User.objects.normalize_email(account_request.email),
                         first_name=account_request.first_name,
                         last_name=account_request.last_name,
-                        password=None  # We'll set the password from the hash
+                        password=account_request.password_hash
                     )
-                    
-                    # Set the pre-hashed password
-                    user.password = account_request.password_hash
                     user.save()
                     
-                    # Approve the user profile (created by signal)
-                    profile = user.profile
-                    profile.is_approved = True
-                    profile.approved_by = request.user
-                    profile.approved_at = timezone.now()
-                    profile.save()
+                    # Approve the user profile (created by signal) without reloading it
+                    UserProfile.objects.filter(user=user).update(
+                        is_approved=True,
+                        approved_by=request.user,
+                        approved_at=timezone.now()
+                    )
                     
                     # Update the request
                     account_request.status = 'approved'
@@ -276,7 +318,7 @@ class APICredentialsView(APIView):
         serializer = APICredentialsSerializer(data=request.data)
         if serializer.is_valid():
             # Update profile flags (credentials not stored server-side)
-            profile = request.user.profile
+            profile = UserProfile.objects.light().get(user=request.user)
             if serializer.validated_data.get('openai_api_key'):
                 profile.openai_api_key_set = True
             if serializer.validated_data.get('custom_endpoint_url'):
@@ -305,7 +347,7 @@ class AnnotationTypesView(APIView):
                 'zones': user_profile.enabled_zone_types or [],
                 'lines': user_profile.enabled_line_types or [],
             },
-            'pagexml_mappings': PAGEXML_MAPPINGS
+            'pagexml_mappings': dict(PAGEXML_MAPPINGS)
         })
 
 
@@ -330,7 +372,7 @@ class UserSearchView(APIView):
         return Response({'results': serializer.data})
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ProjectAccessMixin, viewsets.ModelViewSet):
     """CRUD operations for projects"""
     permission_classes = [IsAuthenticated, IsApprovedUser, IsOwnerOrSharedUser]
     
@@ -341,9 +383,39 @@ class ProjectViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        return Project.objects.filter(
-            Q(owner=user) | Q(shared_with=user)
-        ).distinct().select_related('owner').prefetch_related('documents')
+        queryset = Project.objects.filter(
+            id__in=self.request._viewable_project_ids
+        ).select_related('owner').annotate(
+            document_total=Count('documents', distinct=True),
+            image_total=Count('documents__images', distinct=True)
+        ).prefetch_related(
+            Prefetch(
+                'projectpermission_set',
+                queryset=ProjectPermission.objects.filter(user=user),
+                to_attr='_my_perms'
+            )
+        )
+        
+        # The detail serializer lists every permission with its users
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'projectpermission_set',
+                    queryset=ProjectPermission.objects.select_related('user', 'granted_by')
+                )
+            )
+        
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        # Plain dicts from values() skip the per-row serializer machinery
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).values(
+            *PROJECT_LIST_VALUES
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(project_list_serialize(page))
+        return Response(project_list_serialize(queryset))
     
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -548,7 +620,7 @@ class ShareProjectView(APIView):
             return Response({'error': 'Project not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class DocumentViewSet(viewsets.ModelViewSet):
+class DocumentViewSet(ProjectAccessMixin, viewsets.ModelViewSet):
     """CRUD operations for documents"""
     permission_classes = [IsAuthenticated, IsApprovedUser, IsOwnerOrSharedUser]
     
@@ -558,10 +630,15 @@ class DocumentViewSet(viewsets.ModelViewSet):
         return DocumentListSerializer
     
     def get_queryset(self):
-        user = self.request.user
         queryset = Document.objects.filter(
-            Q(project__owner=user) | Q(project__shared_with=user)
-        ).distinct().select_related('project').prefetch_related('images')
+            project_id__in=self.request._viewable_project_ids
+        ).select_related('project__owner').annotate(image_total=Count('images'))
+        
+        # Only the detail serializer nests the images
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(
+                Prefetch('images', queryset=Image.objects.with_counts())
+            )
         
         # Filter by project if specified
         project_id = self.request.query_params.get('project', None)
@@ -712,10 +789,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
         
         # Check if user has edit/admin permission for all documents
         for doc in queryset:
-            if not (doc.project.owner == request.user or 
-                   doc.project.projectpermission_set.filter(
-                       user=request.user, permission__in=['edit', 'admin']
-                   ).exists()):
+            if doc.project_id not in request._editable_project_ids:
                 return Response(
                     {'error': f'Permission denied for document: {doc.name}'}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -730,7 +804,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
         })
 
 
-class ImageViewSet(viewsets.ModelViewSet):
+class ImageViewSet(ProjectAccessMixin, SerializerColumnsMixin, viewsets.ModelViewSet):
     """CRUD operations for images"""
     permission_classes = [IsAuthenticated, IsApprovedUser, IsOwnerOrSharedUser]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
@@ -741,10 +815,35 @@ class ImageViewSet(viewsets.ModelViewSet):
         return ImageListSerializer
     
     def get_queryset(self):
-        user = self.request.user
         queryset = Image.objects.filter(
-            Q(document__project__owner=user) | Q(document__project__shared_with=user)
-        ).distinct().select_related('document__project').prefetch_related('annotations', 'transcriptions')
+            project_id__in=self.request._viewable_project_ids
+        ).select_related('document__project').with_counts()
+        
+        # Only the detail serializer nests annotations and transcriptions
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(
+                Prefetch('annotations', queryset=Annotation.objects.select_related('created_by')),
+                Prefetch(
+                    'transcriptions',
+                    queryset=Transcription.objects.select_related(
+                        'created_by', 'annotation__created_by'
+                    )
+                ),
+                Prefetch(
+                    'transcriptions',
+                    queryset=Transcription.objects.filter(
+                        is_current=True, annotation__isnull=True
+                    ).select_related('created_by'),
+                    to_attr='current_transcriptions'
+                )
+            )
+        
+        # Lists only need the serialized columns plus the names str(document) uses
+        if self.action == 'list':
+            queryset = self.get_optimized_queryset(
+                queryset, ImageListSerializer,
+                'project', 'document__name', 'document__project__name'
+            )
         
         # Filter by document if specified
         document_id = self.request.query_params.get('document', None)
@@ -754,7 +853,7 @@ class ImageViewSet(viewsets.ModelViewSet):
         # Filter by project if specified
         project_id = self.request.query_params.get('project', None)
         if project_id:
-            queryset = queryset.filter(document__project__id=project_id)
+            queryset = queryset.filter(project_id=project_id)
             
         return queryset
     
@@ -842,10 +941,7 @@ class ImageViewSet(viewsets.ModelViewSet):
         
         # Check if user has edit/admin permission for all images
         for img in queryset:
-            if not (img.document.project.owner == request.user or 
-                   img.document.project.projectpermission_set.filter(
-                       user=request.user, permission__in=['edit', 'admin']
-                   ).exists()):
+            if img.project_id not in request._editable_project_ids:
                 return Response(
                     {'error': f'Permission denied for image: {img.name}'}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -886,8 +982,7 @@ class ImageUploadView(APIView):
             image = Image.objects.get(pk=pk)
             # Check permissions
             user = request.user
-            if not (image.document.project.owner == user or 
-                   image.document.project.shared_with.filter(id=user.id).exists()):
+            if not user_can_view_project(user, image.project_id):
                 return Response(
                     {'error': 'Permission denied'}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -927,17 +1022,15 @@ class ImageUploadView(APIView):
             return Response({'error': 'Image not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class AnnotationViewSet(viewsets.ModelViewSet):
+class AnnotationViewSet(ProjectAccessMixin, viewsets.ModelViewSet):
     """CRUD operations for annotations"""
     permission_classes = [IsAuthenticated, IsApprovedUser, IsOwnerOrSharedUser]
     serializer_class = AnnotationSerializer
     
     def get_queryset(self):
-        user = self.request.user
         return Annotation.objects.filter(
-            Q(image__document__project__owner=user) | 
-            Q(image__document__project__shared_with=user)
-        ).distinct().select_related('image__document__project', 'created_by')
+            project_id__in=self.request._viewable_project_ids
+        ).select_related('image__document__project__owner', 'created_by')
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -952,8 +1045,7 @@ class ImageAnnotationsView(APIView):
             image = Image.objects.get(pk=pk)
             # Check permissions
             user = request.user
-            if not (image.document.project.owner == user or 
-                   image.document.project.shared_with.filter(id=user.id).exists()):
+            if not user_can_view_project(user, image.project_id):
                 return Response(
                     {'error': 'Permission denied'}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -976,8 +1068,7 @@ class ReorderAnnotationsView(APIView):
             image = Image.objects.get(pk=pk)
             # Check permissions
             user = request.user
-            if not (image.document.project.owner == user or 
-                   image.document.project.shared_with.filter(id=user.id).exists()):
+            if not user_can_view_project(user, image.project_id):
                 return Response(
                     {'error': 'Permission denied'}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -990,18 +1081,22 @@ class ReorderAnnotationsView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Update reading orders
-            for annotation_data in annotations_data:
-                annotation_id = annotation_data.get('id')
-                reading_order = annotation_data.get('reading_order')
-                
-                if annotation_id is not None and reading_order is not None:
-                    try:
-                        annotation = Annotation.objects.get(id=annotation_id, image=image)
-                        annotation.reading_order = reading_order
-                        annotation.save()
-                    except Annotation.DoesNotExist:
-                        continue
+            # Update reading orders with one bulk UPDATE; ids not on this image are skipped
+            reading_orders = {
+                str(annotation_data['id']): annotation_data['reading_order']
+                for annotation_data in annotations_data
+                if annotation_data.get('id') is not None
+                and annotation_data.get('reading_order') is not None
+            }
+            annotations = list(
+                Annotation.objects.filter(image=image, id__in=reading_orders)
+                .only('id', 'reading_order')
+            )
+            now = timezone.now()
+            for annotation in annotations:
+                annotation.reading_order = reading_orders[str(annotation.id)]
+                annotation.updated_at = now
+            Annotation.objects.bulk_update(annotations, ['reading_order', 'updated_at'])
             
             return Response({'message': 'Annotation order updated successfully'})
             
@@ -1009,17 +1104,17 @@ class ReorderAnnotationsView(APIView):
             return Response({'error': 'Image not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class TranscriptionViewSet(viewsets.ModelViewSet):
+class TranscriptionViewSet(ProjectAccessMixin, viewsets.ModelViewSet):
     """CRUD operations for transcriptions"""
     permission_classes = [IsAuthenticated, IsApprovedUser, IsOwnerOrSharedUser]
     serializer_class = TranscriptionSerializer
     
     def get_queryset(self):
-        user = self.request.user
         return Transcription.objects.filter(
-            Q(image__document__project__owner=user) | 
-            Q(image__document__project__shared_with=user)
-        ).distinct().select_related('image__document__project', 'created_by', 'annotation')
+            project_id__in=self.request._viewable_project_ids
+        ).select_related(
+            'image__document__project__owner', 'created_by', 'annotation'
+        ).defer('api_response_raw')
 
 
 class TranscribeImageView(APIView):
@@ -1031,8 +1126,7 @@ class TranscribeImageView(APIView):
             image = Image.objects.get(pk=pk)
             # Check permissions
             user = request.user
-            if not (image.document.project.owner == user or 
-                   image.document.project.shared_with.filter(id=user.id).exists()):
+            if not user_can_view_project(user, image.project_id):
                 return Response(
                     {'error': 'Permission denied'}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -1100,8 +1194,7 @@ class TranscribeAnnotationView(APIView):
             annotation = Annotation.objects.get(pk=pk)
             # Check permissions
             user = request.user
-            if not (annotation.image.document.project.owner == user or 
-                   annotation.image.document.project.shared_with.filter(id=user.id).exists()):
+            if not user_can_view_project(user, annotation.project_id):
                 return Response(
                     {'error': 'Permission denied'}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -1111,6 +1204,10 @@ class TranscribeAnnotationView(APIView):
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
+            # A re-run of an already transcribed region asks the API again
+            # instead of returning the cached result
+            is_rerun = annotation.transcriptions.exists()
+            
             # Create transcription record
             transcription = Transcription.objects.create(
                 image=annotation.image,
@@ -1140,7 +1237,8 @@ class TranscribeAnnotationView(APIView):
                     vertex_access_token=serializer.validated_data.get('vertex_access_token'),
                     vertex_project_id=serializer.validated_data.get('vertex_project_id'),
                     vertex_location=serializer.validated_data.get('vertex_location'),
-                    vertex_model=serializer.validated_data.get('vertex_model')
+                    vertex_model=serializer.validated_data.get('vertex_model'),
+                    refresh=is_rerun
                 )
                 processing_time = time.time() - start_time
                 
@@ -1180,8 +1278,7 @@ class RevertTranscriptionView(APIView):
             transcription = Transcription.objects.get(pk=pk)
             # Check permissions
             user = request.user
-            if not (transcription.image.document.project.owner == user or 
-                   transcription.image.document.project.shared_with.filter(id=user.id).exists()):
+            if not user_can_view_project(user, transcription.project_id):
                 return Response(
                     {'error': 'Permission denied'}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -1219,8 +1316,7 @@ class DetectZonesLinesView(APIView):
             
             # Check permissions
             user = request.user
-            if not (image.document.project.owner == user or 
-                   image.document.project.shared_with.filter(id=user.id).exists()):
+            if not user_can_view_project(user, image.project_id):
                 return Response(
                     {'error': 'Permission denied'}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -1307,18 +1403,19 @@ class DetectZonesLinesView(APIView):
                     Annotation.objects.filter(image=image).delete()
                 
                 # Create annotation records in database
-                created_annotations = []
-                for i, detection in enumerate(detection_results['detections']):
-                    from .models import Annotation
-                    annotation = Annotation.objects.create(
-                        image=image,
-                        annotation_type='bbox',  # Roboflow returns bounding boxes
-                        coordinates=detection['coordinates'],
-                        classification=detection['classification'],
-                        reading_order=i,
-                        created_by=user
-                    )
-                    created_annotations.append(annotation)
+                created_annotations = Annotation.objects.bulk_create_for_image(
+                    image,
+                    [
+                        {
+                            'annotation_type': 'bbox',  # Roboflow returns bounding boxes
+                            'coordinates': detection['coordinates'],
+                            'classification': detection['classification'],
+                            'reading_order': i,
+                        }
+                        for i, detection in enumerate(detection_results['detections'])
+                    ],
+                    user
+                )
                 
                 return Response({
                     'status': 'success',
@@ -1342,7 +1439,9 @@ class ExportJobViewSet(viewsets.ModelViewSet):
     serializer_class = ExportJobSerializer
     
     def get_queryset(self):
-        return ExportJob.objects.filter(requested_by=self.request.user)
+        return ExportJob.objects.filter(requested_by=self.request.user).select_related(
+            'project', 'document', 'image', 'requested_by'
+        )
     
     def perform_create(self, serializer):
         serializer.save(requested_by=self.request.user)
@@ -1359,8 +1458,7 @@ class ExportImageView(APIView):
             image = Image.objects.get(pk=image_id)
             # Check permissions
             user = request.user
-            if not (image.document.project.owner == user or 
-                   image.document.project.shared_with.filter(id=user.id).exists()):
+            if not user_can_view_project(user, image.project_id):
                 return Response(
                     {'error': 'Permission denied'}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -1411,8 +1509,7 @@ class ExportDocumentView(APIView):
             document = Document.objects.get(pk=document_id)
             # Check permissions
             user = request.user
-            if not (document.project.owner == user or 
-                   document.project.shared_with.filter(id=user.id).exists()):
+            if not user_can_view_project(user, document.project_id):
                 return Response(
                     {'error': 'Permission denied'}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -1463,8 +1560,7 @@ class ExportProjectView(APIView):
             project = Project.objects.get(pk=project_id)
             # Check permissions
             user = request.user
-            if not (project.owner == user or 
-                   project.shared_with.filter(id=user.id).exists()):
+            if not user_can_view_project(user, project.id):
                 return Response(
                     {'error': 'Permission denied'}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -1538,6 +1634,11 @@ class DownloadExportView(APIView):
                 content_type = 'application/zip'
                 file_extension = 'zip'
             
+            # Bulk JSON exports are written gzip-compressed
+            if export_job.file_path.endswith('.gz'):
+                content_type = 'application/gzip'
+                file_extension = f"{file_extension}.gz"
+            
             # Generate filename
             filename = f"{export_job.export_type}_{export_job.id}.{file_extension}"
             
@@ -1570,7 +1671,7 @@ class BulkExportView(APIView):
             id__in=project_ids
         ).filter(
             Q(owner=user) | Q(shared_with=user)
-        ).distinct()
+        ).distinct().select_related('owner')
         
         if projects.count() != len(project_ids):
             return Response(
@@ -1933,13 +2034,13 @@ class ImportProjectView(APIView):
                 # Import VLAMy ZIP format
                 imported_projects = import_service.import_vlamy_zip(uploaded_file, request.user)
                 
-            elif import_format == 'json' and uploaded_file.name.lower().endswith('.json'):
-                # Import JSON format
+            elif import_format == 'json' and uploaded_file.name.lower().endswith(('.json', '.json.gz')):
+                # Import JSON format, including gzipped bulk exports
                 imported_projects = import_service.import_json_export(uploaded_file, request.user)
                 
             else:
                 return Response(
-                    {'error': 'Unsupported file format. Use .zip for VLAMy format or .json for JSON format'}, 
+                    {'error': 'Unsupported file format. Use .zip for VLAMy format or .json/.json.gz for JSON format'}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
@@ -13134,7 +13134,8 @@ class OCRApp {
             return;
         }
         
-        if (importFormat === 'json' && !file.name.toLowerCase().endsWith('.json')) {
+        const fileName = file.name.toLowerCase();
+        if (importFormat === 'json' && !(fileName.endsWith('.json') || fileName.endsWith('.json.gz'))) {
             this.showAlert('Please select a JSON file for JSON format', 'warning');
             return;
         }